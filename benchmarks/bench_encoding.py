@@ -0,0 +1,108 @@
+"""Encode time and size of the rank and welcome cards for every utils.encode encoding.
+
+Run from the repository root (the card fonts are loaded from ./data):
+
+    python benchmarks/bench_encoding.py [--runs 30] [--background path/to/photo.png]
+
+Each card is rendered once with the default encoding and decoded back into
+an image (PNG is lossless, so the pixels are exactly what the bot draws);
+only the encoding step is timed. Pick RANK_CARD_ENCODING and
+WELCOME_CARD_ENCODING in config.py from the resulting table.
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from utils.encode import ENCODINGS, encode_image
+from utils.http import AvatarCache
+from utils.rank_card import render_rank_card
+
+
+def sample_avatar(size=256):
+    """A photo-like avatar: smooth gradients with some noise, as PNG bytes"""
+    gradient = Image.linear_gradient('L').resize((size, size))
+    noise = Image.effect_noise((size, size), 40)
+    img = Image.merge('RGB', (gradient, noise, gradient.rotate(90)))
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def rank_card_image(avatar_bytes):
+    card = render_rank_card('BenchmarkUser', 123_456, 54_321, avatar_bytes)
+    return Image.open(io.BytesIO(card)).convert('RGB')
+
+
+def welcome_card_image(avatar_bytes, background):
+    # The cog only needs its settings and the avatar cache for a render
+    from cogs.welcome import Welcome
+
+    async def fetch(session, asset, size=None):
+        return avatar_bytes
+
+    cog = Welcome.__new__(Welcome)
+    cog.settings = SimpleNamespace(get=lambda namespace, guild_id: {'background_path': background})
+    avatar_cache = AvatarCache()
+    avatar_cache.fetch = fetch
+    cog.bot = SimpleNamespace(avatar_cache=avatar_cache, http_session=None)
+    cog._layer_cache = OrderedDict()
+    member = SimpleNamespace(
+        display_name='BenchmarkUser',
+        display_avatar=SimpleNamespace(key='benchmark'),
+        guild=SimpleNamespace(id=1, name='Benchmark Server', member_count=12_345),
+    )
+    card = asyncio.run(cog.generate_welcome_card(member))
+    return Image.open(card).convert('RGB')
+
+
+def bench(img, runs):
+    """Return {encoding: (median seconds, encoded bytes)}"""
+    results = {}
+    for encoding in ENCODINGS:
+        encode_image(img, encoding)  # warm-up
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            data = encode_image(img, encoding)
+            times.append(time.perf_counter() - start)
+        results[encoding] = (statistics.median(times), len(data))
+    return results
+
+
+def report(name, img, results):
+    base_time, base_size = results['png']
+    print(f'\n{name} ({img.width}x{img.height})')
+    print(f"{'encoding':<14}{'encode ms':>11}{'size KiB':>11}{'time':>8}{'size':>8}")
+    for encoding, (seconds, size) in results.items():
+        print(f'{encoding:<14}{seconds * 1000:>11.2f}{size / 1024:>11.1f}'
+              f'{seconds / base_time:>7.2f}x{size / base_size:>7.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=30, help='timed encodes per encoding (median is reported)')
+    parser.add_argument('--background', default=None,
+                        help='welcome background image; the built-in gradient is used otherwise')
+    args = parser.parse_args()
+
+    avatar = sample_avatar()
+    cards = (
+        ('Rank card', rank_card_image(avatar)),
+        ('Welcome card', welcome_card_image(avatar, args.background)),
+    )
+    for name, img in cards:
+        report(name, img, bench(img, args.runs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Latency, throughput and allocations of the Levelling hot paths at 10^3 to 10^6 users.
+
+Run from the repository root:
+
+    python benchmarks/bench_levelling.py [--users 1000,10000,100000,1000000]
+        [--backend json|sqlite] [--journal] [--ops 20000]
+        [--save results.json] [--baseline results.json]
+
+For each user count a synthetic xp_data.json is written to a temporary
+directory and the real Levelling cog is loaded over it with the fake
+Discord objects from harness.py. It then drives:
+
+  on_message       one message from a random member (spam filter, XP, level-ups)
+  voice tick       one voice_xp_loop tick crediting a minute to every member in voice
+  /top             a random leaderboard page, text or voice
+  add_xp/remove_xp alternating direct XP changes
+
+Each is reported as p50/p99 latency, throughput, net bytes retained per op
+and the tracemalloc peak. --save writes the numbers as JSON and --baseline
+prints the change against an earlier --save, so a storage or algorithm
+change can be compared on the same machine without a gateway.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness import (FakeBot, FakeChannel, FakeGuild, FakeInteraction, FakeMessage, FakeVoiceState,
+                     drain_tasks, install_storage, measure, write_xp_data)
+
+LEVEL_CHANNEL_ID = 1
+VOICE_CHANNEL_ID = 2
+MESSAGE = 'just a regular benchmark chat message'
+
+
+async def run_size(users, args):
+    import cogs.levelling as levelling
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix='buzzbot-bench-') as data_dir:
+        members = write_xp_data(data_dir, users, args.guilds, args.seed)
+        storage = install_storage(data_dir, args.backend)
+        # The cog opens XP_JOURNAL_PATH itself; keep it inside the temporary directory
+        levelling.XP_JOURNAL_PATH = os.path.join(data_dir, 'xp_journal.bin') if args.journal else None
+
+        guilds = [FakeGuild(guild_id, user_ids) for guild_id, user_ids in members.items()]
+        bot = FakeBot(guilds)
+
+        started = time.perf_counter()
+        cog = levelling.Levelling(bot)
+        load_seconds = time.perf_counter() - started
+
+        for guild in guilds:
+            guild.add_channel(FakeChannel(LEVEL_CHANNEL_ID))
+            cog.set_guild_setting(guild.id, 'level_channel_id', LEVEL_CHANNEL_ID)
+
+        results = []
+
+        # on_message
+        messages = []
+        for _ in range(args.ops):
+            guild = rng.choice(guilds)
+            messages.append(FakeMessage(guild.get_member(rng.choice(guild.user_ids)), MESSAGE))
+        results.append(await measure(
+            'on_message', [lambda message=message: cog.on_message(message) for message in messages]))
+
+        # voice_xp_loop: every tick finds a whole minute to credit for each session
+        voice_channel = FakeChannel(VOICE_CHANNEL_ID)
+        in_voice = []
+        for guild in guilds:
+            guild.voice_channels = [voice_channel]
+            share = max(1, min(len(guild.user_ids), args.voice_members // len(guilds)))
+            for user_id in rng.sample(guild.user_ids, share):
+                member = guild.get_member(user_id)
+                member.voice = FakeVoiceState(voice_channel)
+                in_voice.append(member)
+        start = time.time()
+
+        def reset_voice():
+            cog.voice_tracking = {(member.guild.id, member.id): start for member in in_voice}
+
+        reset_voice()
+        results.append(await measure(
+            f'voice tick ({len(in_voice)} in voice)',
+            [lambda tick=tick: cog.credit_voice_sessions(start + 60 * tick) for tick in range(1, args.ticks + 1)],
+            reset=reset_voice,
+        ))
+
+        # /top; the first call per guild builds its leaderboard, which is timed on its own
+        interactions = {guild.id: FakeInteraction(guild) for guild in guilds}
+        started = time.perf_counter()
+        for guild in guilds:
+            await cog.top.callback(cog, interactions[guild.id], 'text', 1)
+        leaderboard_seconds = time.perf_counter() - started
+        calls = []
+        for _ in range(args.ops):
+            guild = rng.choice(guilds)
+            page = rng.randint(1, max(1, len(guild.user_ids) // 10))
+            calls.append(lambda interaction=interactions[guild.id], kind=rng.choice(('text', 'voice')), page=page:
+                         cog.top.callback(cog, interaction, kind, page))
+        results.append(await measure('/top', calls))
+
+        # add_xp / remove_xp
+        calls = []
+        for index in range(args.ops):
+            guild = rng.choice(guilds)
+            user_id = rng.choice(guild.user_ids)
+            change = cog.add_xp if index % 2 == 0 else cog.remove_xp
+            calls.append(lambda change=change, user_id=user_id, guild_id=guild.id, amount=rng.randint(1, 500):
+                         change(user_id, guild_id, text_xp=amount, voice_xp=amount // 2))
+        results.append(await measure('add_xp/remove_xp', calls))
+
+        await drain_tasks()
+        if cog.xp_store.journal is not None:
+            cog.xp_store.journal.close()
+        if hasattr(storage, 'close'):
+            storage.close()
+
+    return {'load_ms': load_seconds * 1000, 'leaderboard_build_ms': leaderboard_seconds * 1000,
+            'results': results}
+
+
+def change(value, old):
+    if not old:
+        return ''
+    return f'{(value - old) / old * 100:+.0f}%'
+
+
+def report(users, run, baseline):
+    print(f"\n{users:,} users: load {run['load_ms']:.0f} ms, "
+          f"leaderboard build {run['leaderboard_build_ms']:.0f} ms")
+    print(f"{'benchmark':<30}{'ops':>8}{'p50 us':>10}{'p99 us':>10}{'ops/s':>11}{'net B/op':>10}{'peak KiB':>10}")
+    for result in run['results']:
+        line = (f'{result.name:<30}{result.ops:>8}{result.p50 * 1e6:>10.1f}{result.p99 * 1e6:>10.1f}'
+                f'{result.throughput:>11.0f}{result.alloc_bytes:>10.1f}{result.peak_bytes / 1024:>10.1f}')
+        old = baseline.get(str(users), {}).get('results', {}).get(result.name) if baseline else None
+        if old:
+            line += (f"   p50 {change(result.p50 * 1e6, old['p50_us'])}"
+                     f" p99 {change(result.p99 * 1e6, old['p99_us'])}"
+                     f" ops/s {change(result.throughput, old['ops_per_sec'])}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', default='1000,10000,100000,1000000',
+                        help='comma-separated user counts to benchmark')
+    parser.add_argument('--guilds', type=int, default=1, help='guilds the users are spread over')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--journal', action='store_true', help='journal XP changes like the bot does by default')
+    parser.add_argument('--ops', type=int, default=20_000, help='calls per benchmark')
+    parser.add_argument('--voice-members', type=int, default=1_000, help='members in voice during the voice ticks')
+    parser.add_argument('--ticks', type=int, default=20, help='voice ticks to time')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved earlier with --save')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['sizes']
+
+    print(f'backend={args.backend} journal={args.journal} guilds={args.guilds} ops={args.ops}')
+    saved = {}
+    for users in (int(count) for count in args.users.split(',')):
+        run = asyncio.run(run_size(users, args))
+        report(users, run, baseline)
+        saved[str(users)] = {
+            'load_ms': run['load_ms'],
+            'leaderboard_build_ms': run['leaderboard_build_ms'],
+            'results': {result.name: result.as_dict() for result in run['results']},
+        }
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'sizes': saved}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""Stand-ins for the discord.py objects the Levelling cog touches, plus timing helpers.
+
+Nothing here talks to Discord: the fake bot, guilds, members, messages and
+interactions implement just the attributes and coroutines the cog reads,
+and every send is recorded instead of made.
+"""
+import asyncio
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from utils import settings_cache, storage as storage_module
+from utils.settings_cache import SettingsCache
+from utils.storage import JSONStorage, SQLiteStorage, XP_FILE
+
+
+# ---------------------------------------------------------------------- #
+#  Fake Discord objects                                                   #
+# ---------------------------------------------------------------------- #
+
+class FakeLoop:
+    """bot.loop stand-in: the cog's background loops are not started"""
+
+    def create_task(self, coro):
+        coro.close()
+        return _NoTask()
+
+
+class _NoTask:
+    def cancel(self):
+        pass
+
+
+class FakeChannel:
+    __slots__ = ('id', 'members', 'sent')
+
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.members = []
+        self.sent = 0
+
+    @property
+    def mention(self):
+        return f'<#{self.id}>'
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+class FakeVoiceState:
+    __slots__ = ('channel',)
+
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeMember:
+    __slots__ = ('id', 'guild', 'voice', 'roles')
+
+    bot = False
+
+    def __init__(self, user_id, guild):
+        self.id = user_id
+        self.guild = guild
+        self.voice = None
+        self.roles = []
+
+    @property
+    def mention(self):
+        return f'<@{self.id}>'
+
+    @property
+    def display_name(self):
+        return f'user{self.id}'
+
+    async def add_roles(self, *roles, reason=None):
+        self.roles.extend(roles)
+
+
+class FakeGuild:
+    """A guild whose members are created on first lookup, so 10^6 users cost nothing up front"""
+
+    shard_id = 0
+
+    def __init__(self, guild_id, user_ids):
+        self.id = guild_id
+        self.name = f'guild{guild_id}'
+        self.user_ids = user_ids    # every user with XP, for picking message authors
+        self.members = {}
+        self.channels = {}
+        self.voice_channels = []
+
+    @property
+    def member_count(self):
+        return len(self.user_ids)
+
+    def get_member(self, user_id):
+        member = self.members.get(user_id)
+        if member is None:
+            member = self.members[user_id] = FakeMember(user_id, self)
+        return member
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id):
+        return None
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+
+class FakeMessage:
+    __slots__ = ('author', 'guild', 'content')
+
+    def __init__(self, author, content):
+        self.author = author
+        self.guild = author.guild
+        self.content = content
+
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, content=None, **kwargs):
+        self.sent += 1
+
+    async def defer(self, **kwargs):
+        pass
+
+
+class FakeInteraction:
+    def __init__(self, guild):
+        self.guild = guild
+        self.response = FakeResponse()
+
+
+class FakeBot:
+    def __init__(self, guilds):
+        self.loop = FakeLoop()
+        self.guilds = list(guilds)
+        self._guilds = {guild.id: guild for guild in self.guilds}
+
+    def get_guild(self, guild_id):
+        return self._guilds.get(guild_id)
+
+    def is_shard_online(self, shard_id):
+        return True
+
+    def is_closed(self):
+        return False
+
+
+# ---------------------------------------------------------------------- #
+#  Synthetic data                                                         #
+# ---------------------------------------------------------------------- #
+
+def write_xp_data(data_dir, users, guilds=1, seed=0):
+    """Write an xp_data.json with `users` users spread over `guilds` guilds.
+
+    XP totals follow a long tail like a real server: most users have a
+    little, a few have a lot, and some have no voice XP at all.
+    Returns {guild_id: [user_ids]}.
+    """
+    rng = random.Random(seed)
+    members = {}
+    data = {}
+    for index in range(users):
+        guild_id = 1_000 + index % guilds
+        user_id = 10**17 + index
+        members.setdefault(guild_id, []).append(user_id)
+        data.setdefault(str(guild_id), {})[str(user_id)] = {
+            'text_xp': int(rng.paretovariate(1.2) * 50),
+            'voice_xp': int(rng.paretovariate(1.5) * 20) if rng.random() < 0.6 else 0,
+        }
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, XP_FILE), 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return members
+
+
+def install_storage(data_dir, backend):
+    """Point the process-wide storage and settings cache at data_dir"""
+    if backend == 'sqlite':
+        storage = SQLiteStorage(os.path.join(data_dir, 'buzzbot.db'), data_dir)
+    else:
+        storage = JSONStorage(data_dir)
+    storage_module._storage = storage
+    settings_cache._settings_cache = SettingsCache(storage, watch_interval=0)
+    return storage
+
+
+# ---------------------------------------------------------------------- #
+#  Measurement                                                            #
+# ---------------------------------------------------------------------- #
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Result:
+    def __init__(self, name, ops, latencies, elapsed, alloc_bytes=None, peak_bytes=None):
+        self.name = name
+        self.ops = ops
+        latencies = sorted(latencies)
+        self.p50 = percentile(latencies, 0.50)
+        self.p99 = percentile(latencies, 0.99)
+        self.throughput = ops / elapsed if elapsed else 0.0
+        self.alloc_bytes = alloc_bytes
+        self.peak_bytes = peak_bytes
+
+    def as_dict(self):
+        return {
+            'ops': self.ops,
+            'p50_us': self.p50 * 1e6,
+            'p99_us': self.p99 * 1e6,
+            'ops_per_sec': self.throughput,
+            'alloc_bytes_per_op': self.alloc_bytes,
+            'peak_kib': self.peak_bytes / 1024 if self.peak_bytes is not None else None,
+        }
+
+
+async def _call(call):
+    result = call()
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def measure(name, calls, reset=None):
+    """Time every call in `calls` (plain or async), then replay them under tracemalloc.
+
+    The timed pass runs without tracing so latencies aren't inflated. If
+    the calls change state that the second pass depends on (e.g. voice
+    sessions that have been credited), `reset` restores it in between.
+    """
+    latencies = []
+    gc.collect()
+    started = time.perf_counter()
+    for call in calls:
+        t0 = time.perf_counter()
+        await _call(call)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    if reset is not None:
+        reset()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for call in calls:
+        await _call(call)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ops = len(calls)
+    return Result(name, ops, latencies, elapsed,
+                  alloc_bytes=(after - before) / ops if ops else 0.0,
+                  peak_bytes=peak - before)
+
+
+async def drain_tasks():
+    """Cancel anything the cog scheduled (announcer flushers, async writes)"""
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,102 +1,74 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
-import json
 import asyncio
+import io
 from datetime import datetime, timezone
 
+from utils.audit_cache import AuditEntryCache
+from utils.log_queue import EmbedBatcher
+from utils.message_cache import CachedMessage, MessageCache
+from utils.settings_cache import AuditSettings, get_settings_cache
+
 
 class AuditLog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_dir = 'data'
-        self.settings_file = os.path.join(self.data_dir, 'audit_settings.json')
-        self.init_data_files()
+        self.settings = get_settings_cache()
+        self.settings.start_watching()
+        self.log_queue = EmbedBatcher()
+        self.audit_entries = AuditEntryCache()
+        self.message_cache = MessageCache()
+
+    async def cog_unload(self):
+        """Send any audit log embeds that are still queued."""
+        await self.log_queue.close()
 
     # ------------------------------------------------------------------ #
-    #  Data helpers (mirrors the pattern used in levelling.py)            #
+    #  Data helpers (backed by the shared settings cache)                 #
     # ------------------------------------------------------------------ #
 
-    def init_data_files(self):
-        """Initialise JSON data files."""
-        os.makedirs(self.data_dir, exist_ok=True)
-        if not os.path.exists(self.settings_file):
-            self.save_json(self.settings_file, {})
-
-    def load_json(self, filepath):
-        """Load JSON data from file."""
-        try:
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except (json.JSONDecodeError, IOError):
-            return {}
-
-    def save_json(self, filepath, data):
-        """Save JSON data to file."""
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
-        except IOError:
-            return False
-
-    def get_audit_settings(self, guild_id):
+    def get_audit_settings(self, guild_id) -> AuditSettings:
         """Get audit log settings for a guild."""
-        data = self.load_json(self.settings_file)
-        guild_id_str = str(guild_id)
-        if guild_id_str in data:
-            return data[guild_id_str]
+        settings = self.settings.get('audit', guild_id)
+        if settings is not None:
+            return settings
         return {'channel_id': None}
 
     def set_audit_setting(self, guild_id, key, value):
         """Set a single audit log setting for a guild."""
-        data = self.load_json(self.settings_file)
-        guild_id_str = str(guild_id)
-        if guild_id_str not in data:
-            data[guild_id_str] = {}
-        data[guild_id_str][key] = value
-        self.save_json(self.settings_file, data)
+        self.settings.set('audit', guild_id, key, value)
 
     # ------------------------------------------------------------------ #
     #  Shared utilities                                                   #
     # ------------------------------------------------------------------ #
 
     async def send_log(self, guild: discord.Guild, embed: discord.Embed):
-        """Send an embed to the guild's configured audit log channel."""
+        """Queue an embed for the guild's configured audit log channel.
+
+        Embeds are batched (up to 10 per message) by the log queue.
+        """
         settings   = self.get_audit_settings(guild.id)
         channel_id = settings.get('channel_id')
         if not channel_id:
             return
         channel = guild.get_channel(channel_id)
         if channel:
-            try:
-                await channel.send(embed=embed)
-            except (discord.Forbidden, discord.HTTPException):
-                pass
+            self.log_queue.enqueue(channel, embed)
 
     async def fetch_audit_entry(
         self,
         guild: discord.Guild,
         action: discord.AuditLogAction,
         target_id: int = None,
-        limit: int = 5,
-        delay: float = 0.5,
+        wait: float = None,
     ):
-        """Fetch the most recent audit log entry for an action, optionally filtered by target."""
-        try:
-            if delay > 0:
-                await asyncio.sleep(delay)
-            async for entry in guild.audit_logs(limit=limit, action=action):
-                if target_id is None:
-                    return entry
-                if hasattr(entry.target, 'id') and entry.target.id == target_id:
-                    return entry
-        except (discord.Forbidden, discord.HTTPException):
-            pass
-        return None
+        """Get the most recent audit log entry for an action, optionally filtered by target.
+
+        Served from the gateway-fed entry cache; REST is only used for guilds
+        that aren't delivering audit log events.
+        """
+        return await self.audit_entries.get(guild, action, target_id, wait=wait)
 
     def is_recent(self, entry, seconds: int = 10) -> bool:
         """Return True if the audit log entry was created within the last N seconds."""
@@ -114,42 +86,93 @@ class AuditLog(commands.Cog):
             return text[: max_len - 3] + '...'
         return text
 
+    # ------------------------------------------------------------------ #
+    #  AUDIT LOG ENTRIES                                                  #
+    # ------------------------------------------------------------------ #
+
+    @commands.Cog.listener()
+    async def on_audit_log_entry_create(self, entry: discord.AuditLogEntry):
+        self.audit_entries.add(entry)
+
     # ------------------------------------------------------------------ #
     #  MESSAGE EVENTS                                                     #
     # ------------------------------------------------------------------ #
 
     @commands.Cog.listener()
-    async def on_message_delete(self, message: discord.Message):
+    async def on_message(self, message: discord.Message):
         if not message.guild or message.author.bot:
             return
+        # Only guilds that log anywhere can ever use a cached copy
+        if self.get_audit_settings(message.guild.id).get('channel_id'):
+            self.message_cache.add(message)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.message_cache.remove_guild(guild.id)
+
+    def resolve_author(self, guild: discord.Guild, message):
+        """Return the author of a Message or CachedMessage, or None if they can't be found."""
+        if isinstance(message, CachedMessage):
+            return guild.get_member(message.author_id) or self.bot.get_user(message.author_id)
+        return message.author
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if payload.guild_id is None:
+            return
+        record  = self.message_cache.pop(payload.guild_id, payload.message_id)
+        message = payload.cached_message or record
+        if message is None:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
+        author = self.resolve_author(guild, message)
+        if author is not None and author.bot:
+            return
+        author_id = author.id if author else message.author_id
 
         embed = discord.Embed(
             title='🗑️ Message Deleted',
             color=0xE74C3C,
             timestamp=datetime.now(timezone.utc),
         )
-        embed.set_author(
-            name=str(message.author), icon_url=message.author.display_avatar.url
-        )
-        embed.add_field(name='Author',   value=message.author.mention,                          inline=True)
-        embed.add_field(name='Channel',  value=message.channel.mention,                         inline=True)
-        embed.add_field(name='Sent At',  value=discord.utils.format_dt(message.created_at, 'F'), inline=True)
+        if author:
+            embed.set_author(name=str(author), icon_url=author.display_avatar.url)
+        embed.add_field(name='Author',   value=f'<@{author_id}>',                                                  inline=True)
+        embed.add_field(name='Channel',  value=f'<#{payload.channel_id}>',                                         inline=True)
+        embed.add_field(name='Sent At',  value=discord.utils.format_dt(discord.utils.snowflake_time(message.id), 'F'), inline=True)
 
         content = self.truncate(message.content or '*No text content*', 1000)
         embed.add_field(name='Content', value=content, inline=False)
 
-        if message.attachments:
-            attach = '\n'.join(f'`{a.filename}`' for a in message.attachments)
+        attachments = record.attachments if message is record else [a.filename for a in message.attachments]
+        if attachments:
+            attach = '\n'.join(f'`{name}`' for name in attachments)
             embed.add_field(name='Attachments', value=attach, inline=False)
 
-        embed.set_footer(text=f'Message ID: {message.id}  •  User ID: {message.author.id}')
-        await self.send_log(message.guild, embed)
+        embed.set_footer(text=f'Message ID: {message.id}  •  User ID: {author_id}')
+        await self.send_log(guild, embed)
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before: discord.Message, after: discord.Message):
-        if not before.guild or before.author.bot:
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        if payload.guild_id is None or 'content' not in payload.data:
             return
-        if before.content == after.content:
+        after = payload.message
+        if after.author.bot:
+            return
+        record = self.message_cache.get(payload.guild_id, payload.message_id)
+        if payload.cached_message is not None:
+            before_content = payload.cached_message.content
+        elif record is not None:
+            before_content = record.content
+        else:
+            return  # Nothing to compare against (and most likely just an embed unfurl)
+        self.message_cache.update(payload.guild_id, payload.message_id, after.content)
+        if before_content == after.content:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
             return
 
         embed = discord.Embed(
@@ -158,15 +181,80 @@ class AuditLog(commands.Cog):
             timestamp=datetime.now(timezone.utc),
         )
         embed.set_author(
-            name=str(before.author), icon_url=before.author.display_avatar.url
+            name=str(after.author), icon_url=after.author.display_avatar.url
         )
-        embed.add_field(name='Author',          value=before.author.mention,      inline=True)
-        embed.add_field(name='Channel',         value=before.channel.mention,     inline=True)
+        embed.add_field(name='Author',          value=after.author.mention,       inline=True)
+        embed.add_field(name='Channel',         value=f'<#{payload.channel_id}>', inline=True)
         embed.add_field(name='Jump to Message', value=f'[Click here]({after.jump_url})', inline=True)
-        embed.add_field(name='Before', value=self.truncate(before.content or '*No content*', 500), inline=False)
+        embed.add_field(name='Before', value=self.truncate(before_content or '*No content*', 500), inline=False)
         embed.add_field(name='After',  value=self.truncate(after.content  or '*No content*', 500), inline=False)
-        embed.set_footer(text=f'Message ID: {before.id}  •  User ID: {before.author.id}')
-        await self.send_log(before.guild, embed)
+        embed.set_footer(text=f'Message ID: {after.id}  •  User ID: {after.author.id}')
+        await self.send_log(guild, embed)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        """Log a purge as one entry with the deleted messages attached as a text file."""
+        if payload.guild_id is None:
+            return
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
+        channel_id  = self.get_audit_settings(guild.id).get('channel_id')
+        log_channel = guild.get_channel(channel_id) if channel_id else None
+        if log_channel is None:
+            return
+
+        channel  = guild.get_channel_or_thread(payload.channel_id)
+        cached   = {m.id: m for m in payload.cached_messages}
+        for message_id in payload.message_ids:
+            record = self.message_cache.pop(guild.id, message_id)
+            if record is not None:
+                cached.setdefault(message_id, record)
+        digest   = self.bulk_delete_digest(guild, payload.message_ids, cached)
+        filename = f'deleted-messages-{payload.channel_id}.txt'
+
+        embed = discord.Embed(
+            title='🧹 Bulk Message Delete',
+            color=0xC0392B,
+            timestamp=datetime.now(timezone.utc),
+        )
+        embed.add_field(name='Channel',  value=channel.mention if channel else f'`{payload.channel_id}`', inline=True)
+        embed.add_field(name='Messages', value=f'`{len(payload.message_ids):,}`',                       inline=True)
+        embed.add_field(name='Cached',   value=f'`{len(cached):,}`',                                    inline=True)
+
+        entry = await self.fetch_audit_entry(guild, discord.AuditLogAction.message_bulk_delete, payload.channel_id)
+        if entry and self.is_recent(entry):
+            embed.add_field(name='Deleted By', value=entry.user.mention, inline=True)
+
+        embed.set_footer(text=f'Channel ID: {payload.channel_id}  •  Full list in {filename}')
+        self.log_queue.enqueue(log_channel, embed, discord.File(digest, filename=filename))
+
+    def bulk_delete_digest(self, guild: discord.Guild, message_ids, cached) -> io.BytesIO:
+        """Write one line per deleted message (oldest first) into an in-memory text file.
+
+        `cached` maps message IDs to discord.py Messages or our own CachedMessages.
+        """
+        digest = io.BytesIO()
+        for message_id in sorted(message_ids):
+            message = cached.get(message_id)
+            sent_at = discord.utils.snowflake_time(message_id)
+            if message is None:
+                line = f'[{sent_at:%Y-%m-%d %H:%M:%S}] <message {message_id} was not cached>'
+            else:
+                author    = self.resolve_author(guild, message)
+                author_id = author.id if author else message.author_id
+                bot_tag   = ' [BOT]' if author and author.bot else ''
+                content   = message.content.replace('\n', '\n    ') if message.content else '*No text content*'
+                line      = f'[{sent_at:%Y-%m-%d %H:%M:%S}] {author or "Unknown user"} ({author_id}){bot_tag}: {content}'
+                if isinstance(message, CachedMessage):
+                    for filename in message.attachments:
+                        line += f'\n    attachment: {filename}'
+                else:
+                    for attachment in message.attachments:
+                        line += f'\n    attachment: {attachment.filename} ({attachment.url})'
+            digest.write(line.encode('utf-8') + b'\n')
+        digest.seek(0)
+        return digest
 
     # ------------------------------------------------------------------ #
     #  MEMBER JOIN / LEAVE / KICK / BAN / UNBAN                         #
@@ -192,14 +280,10 @@ class AuditLog(commands.Cog):
     async def on_member_remove(self, member: discord.Member):
         """Handles member leave, distinguishing between a voluntary leave and a kick.
         Bans are excluded here — on_member_ban handles those separately."""
-        # Give Discord's audit log a moment to populate
-        await asyncio.sleep(0.8)
-
-        kick_entry = await self.fetch_audit_entry(
-            member.guild, discord.AuditLogAction.kick, member.id, delay=0
-        )
-        ban_entry = await self.fetch_audit_entry(
-            member.guild, discord.AuditLogAction.ban, member.id, delay=0
+        # Give Discord's audit log a moment to populate; both lookups wait together
+        kick_entry, ban_entry = await asyncio.gather(
+            self.fetch_audit_entry(member.guild, discord.AuditLogAction.kick, member.id, wait=0.8),
+            self.fetch_audit_entry(member.guild, discord.AuditLogAction.ban,  member.id, wait=0.8),
         )
 
         is_recent_kick = kick_entry and self.is_recent(kick_entry, 15)
@@ -402,6 +486,7 @@ class AuditLog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_user_update(self, before: discord.User, after: discord.User):
+        embeds = []
 
         # ── Username change ────────────────────────────────
         if str(before) != str(after):
@@ -414,10 +499,7 @@ class AuditLog(commands.Cog):
             embed.add_field(name='Before', value=f'`{before}`', inline=True)
             embed.add_field(name='After',  value=f'`{after}`',  inline=True)
             embed.set_footer(text=f'User ID: {after.id}')
-
-            for guild in self.bot.guilds:
-                if guild.get_member(after.id):
-                    await self.send_log(guild, embed)
+            embeds.append(embed)
 
         # ── Display name change ────────────────────────────────
         before_global = getattr(before, 'global_name', None)
@@ -437,10 +519,7 @@ class AuditLog(commands.Cog):
             embed.add_field(name='Before', value=b_val, inline=True)
             embed.add_field(name='After',  value=a_val, inline=True)
             embed.set_footer(text=f'User ID: {after.id}')
-
-            for guild in self.bot.guilds:
-                if guild.get_member(after.id):
-                    await self.send_log(guild, embed)
+            embeds.append(embed)
 
         # ── Avatar change ─────────────────────────────────────────────────
         before_av = str(before.avatar.url) if before.avatar else None
@@ -458,10 +537,18 @@ class AuditLog(commands.Cog):
                 embed.add_field(name='Previous Avatar', value=f'[View old avatar]({before_av})', inline=True)
             embed.set_thumbnail(url=after.display_avatar.url)
             embed.set_footer(text=f'User ID: {after.id}')
+            embeds.append(embed)
 
-            for guild in self.bot.guilds:
-                if guild.get_member(after.id):
-                    await self.send_log(guild, embed)
+        if not embeds:
+            return
+        # Only guilds that share the user and have an audit channel set up
+        guilds = [
+            guild for guild in after.mutual_guilds
+            if self.get_audit_settings(guild.id).get('channel_id')
+        ]
+        await asyncio.gather(
+            *(self.send_log(guild, embed) for guild in guilds for embed in embeds)
+        )
 
     # ------------------------------------------------------------------ #
     #  VOICE EVENTS                                                       #
@@ -24,6 +24,12 @@ COG_DISPLAY_INFO = {
         "emoji": "📁",
         "description": "Configure moderator action logging channels",
         "summary": "Detailed event logging for administrators and moderators"
+    },
+    "Status": {
+        "title": "Status Commands",
+        "emoji": "📡",
+        "description": "Check gateway shard health and event throughput",
+        "summary": "Per-shard latency and event counts for bot operators"
     }
 }
 
@@ -3,29 +3,48 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 import time
-import json
-import os
-from PIL import Image, ImageDraw, ImageFont
 import io
-import aiohttp
 import random
 
-from config import DEFAULT_XP_PER_MESSAGE, DEFAULT_VC_XP_PER_MINUTE, MIN_MESSAGE_LENGTH, MAX_MESSAGES_PER_WINDOW, TIME_WINDOW
+from config import DEFAULT_XP_PER_MESSAGE, DEFAULT_VC_XP_PER_MINUTE, MIN_MESSAGE_LENGTH, MAX_MESSAGES_PER_WINDOW, TIME_WINDOW, XP_FLUSH_INTERVAL
+from config import XP_JOURNAL_PATH, XP_COMPACT_INTERVAL, XP_JOURNAL_MAX_BYTES, PRELOAD_FONTS, RANK_CARD_CACHE_MAX_BYTES, RANK_CARD_ENCODING
+from utils.announcer import LevelUpAnnouncer
+from utils.assets import preload_fonts
+from utils.cache import ByteLRUCache
+from utils.encode import card_filename
+from utils.levels import xp_for_level, level_for_xp, xp_in_level
+from utils.rank_card import RANK_CARD_FONTS, render_rank_card
+from utils.ratelimit import SlidingWindowLimiter
+from utils.render_pool import run_render
+from utils.settings_cache import get_settings_cache
+from utils.storage import get_storage
+from utils.xp_journal import XPJournal
+from utils.xp_store import XPStore
 
 class Levelling(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_dir = 'data'
-        self.xp_file = os.path.join(self.data_dir, 'xp_data.json')
-        self.settings_file = os.path.join(self.data_dir, 'guild_settings.json')
-        self.rewards_file = os.path.join(self.data_dir, 'role_rewards.json')
-        
-        # Initialize data directory and files
-        self.init_data_files()
+        self.storage = get_storage()
+        self.settings = get_settings_cache()
+        self.settings.start_watching()
+        
+        # Resident XP data; changes are journaled, synced by xp_flush_loop and
+        # folded into a storage snapshot every XP_COMPACT_INTERVAL and on unload
+        journal = XPJournal(XP_JOURNAL_PATH) if XP_JOURNAL_PATH else None
+        self.xp_store = XPStore(self.storage, journal)
+        self.xp_flush_interval = XP_FLUSH_INTERVAL
+        self.xp_compact_interval = XP_COMPACT_INTERVAL
+        
+        # Finished /rank cards, keyed by everything drawn on them
+        self.rank_card_cache = ByteLRUCache(RANK_CARD_CACHE_MAX_BYTES)
+        self.rank_card_filename = card_filename('rank', RANK_CARD_ENCODING)
+        
+        # Level-up messages are batched per level channel
+        self.announcer = LevelUpAnnouncer()
+        self.fix_all_negative_xp()
         
         # Spam protection tracking
-        self.message_history = {}  # {user_id_guild_id: [list of message timestamps]}
-        self.voice_tracking = {}  # {user_id_guild_id: start_time}
+        self.voice_tracking = {}  # {(guild_id, user_id): time voice XP has been credited up to}
         
         # Default settings
         self.default_xp_per_message = DEFAULT_XP_PER_MESSAGE
@@ -33,80 +52,49 @@ class Levelling(commands.Cog):
         self.min_message_length = MIN_MESSAGE_LENGTH
         self.max_messages_per_window = MAX_MESSAGES_PER_WINDOW
         self.time_window = TIME_WINDOW  # seconds
+        self.spam_limiter = SlidingWindowLimiter(self.max_messages_per_window, self.time_window)
         
         # Start background tasks
         self.bot.loop.create_task(self.voice_xp_loop())
         self.bot.loop.create_task(self.cleanup_message_history())
+        self.xp_flush_task = self.bot.loop.create_task(self.xp_flush_loop())
+        if PRELOAD_FONTS:
+            # Rank cards render in the render pool, so warm the font cache there. Render
+            # threads share one cache; in process mode this starts the first worker, and
+            # every worker also preloads as it starts (see utils.render_pool)
+            self.bot.loop.create_task(run_render(preload_fonts, RANK_CARD_FONTS))
     
-    def init_data_files(self):
-        """Initialize JSON data files"""
-        os.makedirs(self.data_dir, exist_ok=True)
-        
-        # Initialize XP data file
-        if not os.path.exists(self.xp_file):
-            self.save_json(self.xp_file, {})
-        
-        # Initialize guild settings file
-        if not os.path.exists(self.settings_file):
-            self.save_json(self.settings_file, {})
-        
-        # Initialize role rewards file
-        if not os.path.exists(self.rewards_file):
-            self.save_json(self.rewards_file, {})
-        
-        # Fix any negative XP values
-        self.fix_all_negative_xp()
-    
-    def load_json(self, filepath):
-        """Load JSON data from file"""
-        try:
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except (json.JSONDecodeError, IOError):
-            return {}
-    
-    def save_json(self, filepath, data):
-        """Save JSON data to file"""
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
-        except IOError:
-            return False
+    async def cog_unload(self):
+        """Stop the flush loop, write pending XP changes and send queued level-ups"""
+        self.xp_flush_task.cancel()
+        await self.xp_store.compact()
+        if self.xp_store.journal is not None:
+            self.xp_store.journal.close()
+        await self.announcer.close()
     
     def fix_all_negative_xp(self):
         """Fix all negative XP values in the data"""
-        data = self.load_json(self.xp_file)
-        fixed = False
-        
-        for guild_id, users in data.items():
-            for user_id, xp_data in users.items():
-                if isinstance(xp_data, dict):
-                    if xp_data.get('text_xp', 0) < 0:
-                        xp_data['text_xp'] = 0
-                        fixed = True
-                    if xp_data.get('voice_xp', 0) < 0:
-                        xp_data['voice_xp'] = 0
-                        fixed = True
-        
-        if fixed:
-            self.save_json(self.xp_file, data)
+        if self.xp_store.fix_negative():
+            self.xp_store.flush()
+    
+    async def xp_flush_loop(self):
+        """Periodically sync XP changes and fold the journal into a snapshot"""
+        await self.bot.wait_until_ready()
+        last_compact = time.monotonic()
+        
+        while not self.bot.is_closed():
+            await asyncio.sleep(self.xp_flush_interval)
+            self.xp_store.flush()
+            journal = self.xp_store.journal
+            due = time.monotonic() - last_compact >= self.xp_compact_interval
+            if journal is not None and (due or journal.size() >= XP_JOURNAL_MAX_BYTES):
+                await self.xp_store.compact()
+                last_compact = time.monotonic()
     
     def get_user_xp(self, user_id, guild_id):
         """Get user's XP data"""
-        data = self.load_json(self.xp_file)
-        guild_id_str = str(guild_id)
-        user_id_str = str(user_id)
-        
-        if guild_id_str in data and user_id_str in data[guild_id_str]:
-            xp_data = data[guild_id_str][user_id_str]
-            return {
-                'text_xp': max(0, int(xp_data.get('text_xp', 0))),
-                'voice_xp': max(0, int(xp_data.get('voice_xp', 0)))
-            }
-        return {'text_xp': 0, 'voice_xp': 0}
+        text_xp, voice_xp = self.xp_store.get(user_id, guild_id)
+        return {'text_xp': text_xp, 'voice_xp': voice_xp}
     
     def add_xp(self, user_id, guild_id, text_xp=0, voice_xp=0):
         """Add XP to a user - ensures values are never negative"""
@@ -115,39 +103,17 @@ class Levelling(commands.Cog):
         voice_xp_to_add = max(0, abs(int(voice_xp))) if voice_xp else 0
         
         if text_xp_to_add == 0 and voice_xp_to_add == 0:
-            current = self.get_user_xp(user_id, guild_id)
-            return current['text_xp'], current['voice_xp']
-        
-        # Load current data
-        data = self.load_json(self.xp_file)
-        guild_id_str = str(guild_id)
-        user_id_str = str(user_id)
-        
-        # Initialize guild if needed
-        if guild_id_str not in data:
-            data[guild_id_str] = {}
+            return self.xp_store.get(user_id, guild_id)
         
         # Get current XP
-        if user_id_str in data[guild_id_str]:
-            current_text = max(0, int(data[guild_id_str][user_id_str].get('text_xp', 0)))
-            current_voice = max(0, int(data[guild_id_str][user_id_str].get('voice_xp', 0)))
-        else:
-            current_text = 0
-            current_voice = 0
+        current_text, current_voice = self.xp_store.get(user_id, guild_id)
         
         # Calculate new XP (only addition, never subtraction)
         new_text_xp = max(0, current_text + text_xp_to_add)
         new_voice_xp = max(0, current_voice + voice_xp_to_add)
         
-        # Update data
-        if user_id_str not in data[guild_id_str]:
-            data[guild_id_str][user_id_str] = {}
-        
-        data[guild_id_str][user_id_str]['text_xp'] = new_text_xp
-        data[guild_id_str][user_id_str]['voice_xp'] = new_voice_xp
-        
-        # Save to file
-        self.save_json(self.xp_file, data)
+        # Update in memory; xp_flush_loop persists it
+        self.xp_store.set(user_id, guild_id, new_text_xp, new_voice_xp)
         
         return new_text_xp, new_voice_xp
     
@@ -157,45 +123,25 @@ class Levelling(commands.Cog):
         voice_xp_to_remove = max(0, abs(int(voice_xp))) if voice_xp else 0
         
         if text_xp_to_remove == 0 and voice_xp_to_remove == 0:
-            current = self.get_user_xp(user_id, guild_id)
-            return current['text_xp'], current['voice_xp']
-        
-        # Load current data
-        data = self.load_json(self.xp_file)
-        guild_id_str = str(guild_id)
-        user_id_str = str(user_id)
+            return self.xp_store.get(user_id, guild_id)
         
         # Get current XP
-        current = self.get_user_xp(user_id, guild_id)
-        current_text = current['text_xp']
-        current_voice = current['voice_xp']
+        current_text, current_voice = self.xp_store.get(user_id, guild_id)
         
         # Calculate new XP (subtract but never go below 0)
         new_text_xp = max(0, current_text - text_xp_to_remove)
         new_voice_xp = max(0, current_voice - voice_xp_to_remove)
         
-        # Initialize if needed
-        if guild_id_str not in data:
-            data[guild_id_str] = {}
-        if user_id_str not in data[guild_id_str]:
-            data[guild_id_str][user_id_str] = {}
-        
-        # Update data
-        data[guild_id_str][user_id_str]['text_xp'] = new_text_xp
-        data[guild_id_str][user_id_str]['voice_xp'] = new_voice_xp
-        
-        # Save to file
-        self.save_json(self.xp_file, data)
+        # Update in memory; xp_flush_loop persists it
+        self.xp_store.set(user_id, guild_id, new_text_xp, new_voice_xp)
         
         return new_text_xp, new_voice_xp
     
     def get_guild_settings(self, guild_id):
         """Get guild settings"""
-        data = self.load_json(self.settings_file)
-        guild_id_str = str(guild_id)
+        settings = self.settings.get('levelling', guild_id)
         
-        if guild_id_str in data:
-            settings = data[guild_id_str]
+        if settings is not None:
             return {
                 'level_channel_id': settings.get('level_channel_id'),
                 'xp_per_message_min': settings.get('xp_per_message_min', self.default_xp_per_message[0]),
@@ -212,51 +158,19 @@ class Levelling(commands.Cog):
     
     def set_guild_setting(self, guild_id, key, value):
         """Set a guild setting"""
-        data = self.load_json(self.settings_file)
-        guild_id_str = str(guild_id)
-        
-        if guild_id_str not in data:
-            data[guild_id_str] = {}
-        
-        data[guild_id_str][key] = value
-        self.save_json(self.settings_file, data)
+        self.settings.set('levelling', guild_id, key, value)
     
     def calculate_xp_for_level(self, level):
         """Calculate XP required to reach a specific level"""
-        if level <= 0:
-            return 0
-        # ProBot formula: XP = (level / 0.55) ^ (1 / 0.55) * 100
-        return int((level / 0.55) ** (1 / 0.55) * 100)
+        return xp_for_level(level)
     
     def calculate_level(self, xp):
-        """Calculate level from XP (ProBot formula) - finds highest level where required XP <= user XP"""
-        if xp <= 0:
-            return 0
-        
-        # Find the highest level where the required XP is <= user's XP
-        level = 0
-        while True:
-            xp_needed = self.calculate_xp_for_level(level + 1)
-            if xp_needed > xp:
-                return level
-            level += 1
-            # Safety check to prevent infinite loops
-            if level > 10000:
-                return level
+        """Calculate level from XP (ProBot formula) via the precomputed threshold table"""
+        return level_for_xp(xp)
     
     def get_xp_in_level(self, xp, level):
         """Get XP progress within current level"""
-        # XP required to reach current level
-        xp_for_current_level = self.calculate_xp_for_level(level)
-        # XP required to reach next level
-        xp_for_next_level = self.calculate_xp_for_level(level + 1)
-        
-        # XP progress in current level (how much XP they have beyond the level requirement)
-        xp_in_current = max(0, xp - xp_for_current_level)
-        # XP needed to reach next level
-        xp_needed_for_next = max(1, xp_for_next_level - xp_for_current_level)
-        
-        return xp_in_current, xp_needed_for_next
+        return xp_in_level(xp, level)
     
     async def check_level_up(self, user, guild, old_text_xp, new_text_xp, old_voice_xp, new_voice_xp):
         """Check if user leveled up and handle role rewards"""
@@ -282,17 +196,12 @@ class Levelling(commands.Cog):
                         level_msg += f"\n`Text Level: {old_text_level} → {new_text_level}`"
                     if voice_leveled_up:
                         level_msg += f"\n`Voice Level: {old_voice_level} → {new_voice_level}`"
-                    await channel.send(level_msg)
+                    self.announcer.announce(channel, level_msg)
     
     async def apply_role_rewards(self, user, guild, text_level, voice_level):
         """Apply role rewards based on levels"""
-        data = self.load_json(self.rewards_file)
-        guild_id_str = str(guild.id)
-        
-        if guild_id_str not in data:
-            return
+        rewards = self.storage.get_role_rewards(guild.id)
         
-        rewards = data[guild_id_str]
         for role_id_str, reward_data in rewards.items():
             req_text = reward_data.get('text_level', 0)
             req_voice = reward_data.get('voice_level', 0)
@@ -312,18 +221,7 @@ class Levelling(commands.Cog):
         
         while not self.bot.is_closed():
             await asyncio.sleep(60)
-            
-            current_time = time.time()
-            cutoff_time = current_time - (self.time_window * 2)
-            
-            keys_to_remove = []
-            for key, message_times in self.message_history.items():
-                self.message_history[key] = [t for t in message_times if t > cutoff_time]
-                if not self.message_history[key]:
-                    keys_to_remove.append(key)
-            
-            for key in keys_to_remove:
-                del self.message_history[key]
+            self.spam_limiter.sweep(time.monotonic())
     
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -339,29 +237,10 @@ class Levelling(commands.Cog):
         
         settings = self.get_guild_settings(message.guild.id)
         
-        # Spam protection
-        cooldown_key = f"{message.author.id}_{message.guild.id}"
-        current_time = time.time()
-        
-        if cooldown_key not in self.message_history:
-            self.message_history[cooldown_key] = []
-        
-        # Remove old timestamps
-        cutoff_time = current_time - self.time_window
-        self.message_history[cooldown_key] = [
-            t for t in self.message_history[cooldown_key] if t > cutoff_time
-        ]
-        
-        # Check spam limit
-        recent_messages = len(self.message_history[cooldown_key])
-        if recent_messages >= self.max_messages_per_window:
-            # Spam detected - don't award XP, just track message
-            self.message_history[cooldown_key].append(current_time)
+        # Spam protection - every message is recorded, only those within the limit earn XP
+        if not self.spam_limiter.hit((message.author.id, message.guild.id), time.monotonic()):
             return
         
-        # User is eligible - add message to history
-        self.message_history[cooldown_key].append(current_time)
-        
         # Get current XP before adding
         old_data = self.get_user_xp(message.author.id, message.guild.id)
         
@@ -378,16 +257,7 @@ class Levelling(commands.Cog):
             new_text_xp = max(0, new_text_xp)
             new_voice_xp = max(0, new_voice_xp)
             # Force update
-            data = self.load_json(self.xp_file)
-            guild_id_str = str(message.guild.id)
-            user_id_str = str(message.author.id)
-            if guild_id_str not in data:
-                data[guild_id_str] = {}
-            if user_id_str not in data[guild_id_str]:
-                data[guild_id_str][user_id_str] = {}
-            data[guild_id_str][user_id_str]['text_xp'] = new_text_xp
-            data[guild_id_str][user_id_str]['voice_xp'] = new_voice_xp
-            self.save_json(self.xp_file, data)
+            self.xp_store.set(message.author.id, message.guild.id, new_text_xp, new_voice_xp)
         
         # Check for level up
         await self.check_level_up(message.author, message.guild,
@@ -396,174 +266,124 @@ class Levelling(commands.Cog):
     
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
-        """Track voice channel activity"""
+        """Track voice channel sessions"""
         if member.bot:
             return
         
-        guild_id = member.guild.id
-        user_id = member.id
-        key = f"{user_id}_{guild_id}"
+        key = (member.guild.id, member.id)
         
         # User joined voice channel
         if after.channel and not before.channel:
-            self.voice_tracking[key] = time.time()
+            self.voice_tracking.setdefault(key, time.time())
         
-        # User left voice channel
+        # User left voice channel - credit the minutes since the last tick
         elif before.channel and not after.channel:
-            if key in self.voice_tracking:
-                del self.voice_tracking[key]
+            credited_until = self.voice_tracking.pop(key, None)
+            if credited_until is not None:
+                minutes = int((time.time() - credited_until) // 60)
+                if minutes > 0:
+                    settings = self.get_guild_settings(member.guild.id)
+                    await self.award_voice_xp(member, settings['vc_xp_per_minute'] * minutes)
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Pick up voice sessions missed while the gateway was disconnected"""
+        self.scan_voice_channels(self.bot.guilds)
+    
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id):
+        """Pick up voice sessions on a shard that came back with a fresh session"""
+        self.scan_voice_channels(guild for guild in self.bot.guilds if guild.shard_id == shard_id)
+    
+    def scan_voice_channels(self, guilds):
+        """Start sessions for members already in voice (e.g. after a restart)"""
+        now = time.time()
+        for guild in guilds:
+            for channel in guild.voice_channels:
+                for member in channel.members:
+                    if not member.bot:
+                        self.voice_tracking.setdefault((guild.id, member.id), now)
+    
+    async def award_voice_xp(self, member, voice_xp):
+        """Add voice XP to a member and handle any level-up"""
+        old_data = self.get_user_xp(member.id, member.guild.id)
+        new_text_xp, new_voice_xp = self.add_xp(member.id, member.guild.id, voice_xp=voice_xp)
+        
+        await self.check_level_up(member, member.guild,
+                                  old_data['text_xp'], new_text_xp,
+                                  old_data['voice_xp'], new_voice_xp)
     
     async def voice_xp_loop(self):
-        """Award voice XP every minute"""
+        """Credit elapsed voice time once a minute, one batch per guild"""
         await self.bot.wait_until_ready()
+        self.scan_voice_channels(self.bot.guilds)
         
         while not self.bot.is_closed():
             await asyncio.sleep(60)
+            await self.credit_voice_sessions(time.time())
+    
+    async def credit_voice_sessions(self, now):
+        """One voice_xp_loop tick: credit every tracked session up to now"""
+        sessions_by_guild = {}
+        for guild_id, user_id in self.voice_tracking:
+            sessions_by_guild.setdefault(guild_id, []).append(user_id)
+        
+        for guild_id, sessions in sessions_by_guild.items():
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                for user_id in sessions:
+                    self.voice_tracking.pop((guild_id, user_id), None)
+                continue
             
-            current_time = time.time()
-            to_remove = []
+            # Voice state is stale while the guild's shard is down; credit
+            # the gap once it's back (a fresh session rescans on shard ready)
+            if not self.bot.is_shard_online(guild.shard_id):
+                continue
             
-            for key, start_time in self.voice_tracking.items():
-                user_id, guild_id = map(int, key.split('_'))
+            settings = self.get_guild_settings(guild_id)
+            for user_id in sessions:
+                key = (guild_id, user_id)
                 
                 # Check if user is still in VC
-                guild = self.bot.get_guild(guild_id)
-                if not guild:
-                    to_remove.append(key)
-                    continue
-                
                 member = guild.get_member(user_id)
                 if not member or not member.voice or not member.voice.channel:
-                    to_remove.append(key)
+                    self.voice_tracking.pop(key, None)
                     continue
                 
-                # Award XP
-                settings = self.get_guild_settings(guild_id)
-                old_data = self.get_user_xp(user_id, guild_id)
-                new_text_xp, new_voice_xp = self.add_xp(user_id, guild_id,
-                                                        voice_xp=settings['vc_xp_per_minute'])
-                
-                await self.check_level_up(member, guild,
-                                         old_data['text_xp'], new_text_xp,
-                                         old_data['voice_xp'], new_voice_xp)
-            
-            for key in to_remove:
-                if key in self.voice_tracking:
-                    del self.voice_tracking[key]
+                # Credit whole minutes; the partial minute carries over to the next tick
+                credited_until = self.voice_tracking.get(key)
+                if credited_until is None:
+                    continue
+                minutes = int((now - credited_until) // 60)
+                if minutes <= 0:
+                    continue
+                self.voice_tracking[key] = credited_until + minutes * 60
+                await self.award_voice_xp(member, settings['vc_xp_per_minute'] * minutes)
     
     async def generate_rank_card(self, user, guild, text_xp, voice_xp):
         """Generate rank card image"""
-        # Ensure XP values are integers and non-negative
-        text_xp = max(0, int(text_xp))
-        voice_xp = max(0, int(voice_xp))
-        
-        text_level = self.calculate_level(text_xp)
-        voice_level = self.calculate_level(voice_xp)
-        
-        text_xp_in_level, text_xp_needed = self.get_xp_in_level(text_xp, text_level)
-        voice_xp_in_level, voice_xp_needed = self.get_xp_in_level(voice_xp, voice_level)
-        
-        # Ensure progress values are valid (0.0 to 1.0)
-        text_progress = max(0.0, min(1.0, text_xp_in_level / text_xp_needed if text_xp_needed > 0 else 0.0))
-        voice_progress = max(0.0, min(1.0, voice_xp_in_level / voice_xp_needed if voice_xp_needed > 0 else 0.0))
-        
-        # Create image
-        width, height = 600, 200
-        img = Image.new('RGB', (width, height), color=(44, 47, 51))
-        draw = ImageDraw.Draw(img)
-        
-        # Load fonts
-        try:
-            title_font = ImageFont.truetype("./data/arial.ttf", 24)
-            normal_font = ImageFont.truetype("./data/arial.ttf", 18)
-            small_font = ImageFont.truetype("./data/arial.ttf", 14)
-        except:
-            title_font = ImageFont.load_default()
-            normal_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-        
-        # Download and draw avatar
-        avatar_size = 120
-        avatar_x, avatar_y = 20, 40
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(str(user.display_avatar.url)) as resp:
-                    if resp.status == 200:
-                        avatar_data = await resp.read()
-                        avatar_img = Image.open(io.BytesIO(avatar_data))
-                        avatar_img = avatar_img.resize((avatar_size, avatar_size), Image.Resampling.LANCZOS)
-                        
-                        # Create circular mask
-                        mask = Image.new('L', (avatar_size, avatar_size), 0)
-                        mask_draw = ImageDraw.Draw(mask)
-                        mask_draw.ellipse([0, 0, avatar_size, avatar_size], fill=255)
-                        
-                        # Apply mask
-                        output = Image.new('RGB', (avatar_size, avatar_size), (44, 47, 51))
-                        output.paste(avatar_img, (0, 0), mask)
-                        img.paste(output, (avatar_x, avatar_y))
-                        
-                        # Draw border
-                        draw.ellipse([avatar_x, avatar_y, avatar_x + avatar_size, avatar_y + avatar_size],
-                                   outline=(255, 255, 255), width=3)
-        except:
-            # Fallback circle
-            draw.ellipse([avatar_x, avatar_y, avatar_x + avatar_size, avatar_y + avatar_size],
-                        fill=(114, 137, 218), outline=(255, 255, 255), width=3)
-        
-        # Draw username
-        username = user.display_name[:20]
-        draw.text((160, 30), username, fill=(255, 255, 255), font=title_font)
-        
-        # Draw text level
-        y_offset = 70
-        draw.text((160, y_offset), f"Text Level: {text_level}", fill=(255, 255, 255), font=normal_font)
-        
-        # Text XP bar
-        bar_x, bar_y = 160, y_offset + 30
-        bar_width, bar_height = 400, 20
-        draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height],
-                      fill=(35, 39, 42), outline=(255, 255, 255), width=2)
-        
-        fill_width = int(bar_width * text_progress)
-        if fill_width > 0:
-            fill_width = max(1, fill_width)
-            draw.rectangle([bar_x, bar_y, bar_x + fill_width, bar_y + bar_height],
-                          fill=(114, 137, 218))
-        
-        xp_text = f"{text_xp_in_level}/{text_xp_needed} XP"
-        text_bbox = draw.textbbox((0, 0), xp_text, font=small_font)
-        text_width = text_bbox[2] - text_bbox[0]
-        draw.text((bar_x + bar_width // 2 - text_width // 2, bar_y + 2), xp_text,
-                 fill=(255, 255, 255), font=small_font)
-        
-        # Draw voice level
-        y_offset = 130
-        draw.text((160, y_offset), f"Voice Level: {voice_level}", fill=(255, 255, 255), font=normal_font)
-        
-        # Voice XP bar
-        bar_x, bar_y = 160, y_offset + 30
-        draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height],
-                      fill=(35, 39, 42), outline=(255, 255, 255), width=2)
-        
-        fill_width = int(bar_width * voice_progress)
-        if fill_width > 0:
-            fill_width = max(1, fill_width)
-            draw.rectangle([bar_x, bar_y, bar_x + fill_width, bar_y + bar_height],
-                          fill=(46, 204, 113))
-        
-        xp_text = f"{voice_xp_in_level}/{voice_xp_needed} XP"
-        text_bbox = draw.textbbox((0, 0), xp_text, font=small_font)
-        text_width = text_bbox[2] - text_bbox[0]
-        draw.text((bar_x + bar_width // 2 - text_width // 2, bar_y + 2), xp_text,
-                 fill=(255, 255, 255), font=small_font)
-        
-        # Convert to bytes
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-        
-        return img_bytes
+        # An unchanged card is served as-is, with no avatar fetch or Pillow work
+        key = (guild.id, user.id, text_xp, voice_xp, user.display_name, user.display_avatar.key)
+        card = self.rank_card_cache.get(key)
+        if card is not None:
+            return io.BytesIO(card)
+        
+        # Avatar comes from the bot-wide cache; rendering happens off the event loop
+        avatar_bytes = await self.bot.avatar_cache.fetch(self.bot.http_session, user.display_avatar)
+        
+        card = await run_render(render_rank_card, user.display_name, text_xp, voice_xp, avatar_bytes,
+                                RANK_CARD_ENCODING)
+        # A card drawn with the fallback avatar shouldn't outlive the failed download
+        if avatar_bytes is not None:
+            self.rank_card_cache.put(key, card)
+        return io.BytesIO(card)
+    
+    @staticmethod
+    def format_position(position, total):
+        """Format a leaderboard position as '#k of n'"""
+        if position is None:
+            return "Unranked"
+        return f"#{position} of {total}"
     
     @app_commands.command(name="rank", description="View your level and XP")
     async def rank(self, interaction: discord.Interaction, member: discord.Member = None):
@@ -574,11 +394,20 @@ class Levelling(commands.Cog):
         text_level = self.calculate_level(xp_data['text_xp'])
         voice_level = self.calculate_level(xp_data['voice_xp'])
         
+        leaderboard = self.xp_store.leaderboard(interaction.guild.id)
+        text_position = self.format_position(*leaderboard.position('text_xp', member.id, xp_data['text_xp']))
+        voice_position = self.format_position(*leaderboard.position('voice_xp', member.id, xp_data['voice_xp']))
+        
+        # Rendering can take a moment; acknowledge the interaction first
+        await interaction.response.defer()
+        
         try:
             card = await self.generate_rank_card(member, interaction.guild,
                                                  xp_data['text_xp'], xp_data['voice_xp'])
-            file = discord.File(card, filename="rank.png")
-            await interaction.response.send_message(file=file)
+            file = discord.File(card, filename=self.rank_card_filename)
+            await interaction.followup.send(
+                f"Text Rank: `{text_position}` • Voice Rank: `{voice_position}`", file=file
+            )
         except Exception as e:
             print(f"Error generating rank card: {e}")
             import traceback
@@ -591,9 +420,11 @@ class Levelling(commands.Cog):
             embed = discord.Embed(title=f"{member.display_name}'s Rank", color=discord.Color.blue())
             embed.add_field(name="Text Level", value=f"`Level {text_level}`\n`{text_xp_in_level}/{text_xp_needed} XP`", inline=True)
             embed.add_field(name="Voice Level", value=f"`Level {voice_level}`\n`{voice_xp_in_level}/{voice_xp_needed} XP`", inline=True)
+            embed.add_field(name="Text Rank", value=f"`{text_position}`", inline=True)
+            embed.add_field(name="Voice Rank", value=f"`{voice_position}`", inline=True)
             embed.add_field(name="Total Text XP", value=f"`{xp_data['text_xp']}`", inline=False)
             embed.add_field(name="Total Voice XP", value=f"`{xp_data['voice_xp']}`", inline=False)
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
     
     @app_commands.command(name="top", description="View the leaderboard")
     @app_commands.describe(type="Choose text or voice leaderboard", page="Page number (default: 1)")
@@ -609,32 +440,14 @@ class Levelling(commands.Cog):
         if page < 1:
             page = 1
         
-        # Get all users for this guild
-        data = self.load_json(self.xp_file)
-        guild_id_str = str(interaction.guild.id)
-        
-        if guild_id_str not in data:
-            await interaction.response.send_message(f"No users found for page {page}.", ephemeral=True)
-            return
-        
-        # Build leaderboard
-        users = []
+        # Read the page straight from the guild's ranked index
         xp_key = 'text_xp' if type == 'text' else 'voice_xp'
-        
-        for user_id_str, xp_data in data[guild_id_str].items():
-            if isinstance(xp_data, dict):
-                xp = max(0, int(xp_data.get(xp_key, 0)))
-                if xp > 0:
-                    users.append((int(user_id_str), xp))
-        
-        # Sort by XP descending
-        users.sort(key=lambda x: x[1], reverse=True)
+        leaderboard = self.xp_store.leaderboard(interaction.guild.id)
         
         # Paginate
         per_page = 10
         start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        page_users = users[start_idx:end_idx]
+        page_users = leaderboard.page(xp_key, start_idx, per_page)
         
         if not page_users:
             await interaction.response.send_message(f"No users found for page {page}.", ephemeral=True)
@@ -708,18 +521,7 @@ class Levelling(commands.Cog):
             await interaction.response.send_message("Levels must be 0 or greater.", ephemeral=True)
             return
         
-        data = self.load_json(self.rewards_file)
-        guild_id_str = str(interaction.guild.id)
-        
-        if guild_id_str not in data:
-            data[guild_id_str] = {}
-        
-        data[guild_id_str][str(role.id)] = {
-            'text_level': text_level,
-            'voice_level': voice_level
-        }
-        
-        self.save_json(self.rewards_file, data)
+        self.storage.set_role_reward(interaction.guild.id, role.id, text_level, voice_level)
         
         await interaction.response.send_message(
             f"Added role reward: {role.mention} will be given at `Text Level {text_level}` and `Voice Level {voice_level}`"
@@ -729,29 +531,23 @@ class Levelling(commands.Cog):
     @app_commands.describe(role="The role to remove from rewards")
     @app_commands.default_permissions(administrator=True)
     async def remove_role_reward(self, interaction: discord.Interaction, role: discord.Role):
-        data = self.load_json(self.rewards_file)
-        guild_id_str = str(interaction.guild.id)
-        
-        if guild_id_str in data and str(role.id) in data[guild_id_str]:
-            del data[guild_id_str][str(role.id)]
-            self.save_json(self.rewards_file, data)
+        if self.storage.delete_role_reward(interaction.guild.id, role.id):
             await interaction.response.send_message(f"Removed role reward for {role.mention}")
         else:
             await interaction.response.send_message(f"No role reward found for {role.mention}.", ephemeral=True)
     
     @app_commands.command(name="list-role-rewards", description="List all role rewards")
     async def list_role_rewards(self, interaction: discord.Interaction):
-        data = self.load_json(self.rewards_file)
-        guild_id_str = str(interaction.guild.id)
+        rewards = self.storage.get_role_rewards(interaction.guild.id)
         
-        if guild_id_str not in data or not data[guild_id_str]:
+        if not rewards:
             await interaction.response.send_message("No role rewards configured.", ephemeral=True)
             return
         
         embed = discord.Embed(title="Role Rewards", color=discord.Color.blue())
         description = ""
         
-        for role_id_str, reward_data in data[guild_id_str].items():
+        for role_id_str, reward_data in rewards.items():
             role = interaction.guild.get_role(int(role_id_str))
             role_name = role.mention if role else f"Unknown Role ({role_id_str})"
             text_level = reward_data.get('text_level', 0)
@@ -761,6 +557,27 @@ class Levelling(commands.Cog):
         embed.description = description
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name="levelling-stats", description="Show rank card cache and level-up batching stats")
+    @app_commands.default_permissions(administrator=True)
+    async def levelling_stats(self, interaction: discord.Interaction):
+        cache = self.rank_card_cache.stats()
+        announcer = self.announcer.stats()
+        
+        embed = discord.Embed(title="Levelling Stats", color=discord.Color.blue())
+        embed.add_field(
+            name="Rank Card Cache",
+            value=f"`{cache['hits']:,}` hits • `{cache['misses']:,}` misses • `{cache['bytes'] // 1024:,}` KiB",
+            inline=False
+        )
+        embed.add_field(
+            name="Level-Up Announcements",
+            value=(f"`{announcer['announcements']:,}` announced • `{announcer['messages_sent']:,}` messages • "
+                   f"`{announcer['messages_saved']:,}` saved • `{announcer['failed']:,}` failed • "
+                   f"`{announcer['queued'] + announcer['in_flight']:,}` waiting"),
+            inline=False
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @app_commands.command(name="fix-xp", description="Fix negative XP values for a user or all users")
     @app_commands.describe(member="The user to fix (leave empty to fix all users)", fix_all="Fix all users with negative XP")
     @app_commands.default_permissions(administrator=True)
@@ -774,18 +591,7 @@ class Levelling(commands.Cog):
             new_voice_xp = max(0, old_data['voice_xp'])
             
             if old_data['text_xp'] < 0 or old_data['voice_xp'] < 0:
-                data = self.load_json(self.xp_file)
-                guild_id_str = str(interaction.guild.id)
-                user_id_str = str(member.id)
-                
-                if guild_id_str not in data:
-                    data[guild_id_str] = {}
-                if user_id_str not in data[guild_id_str]:
-                    data[guild_id_str][user_id_str] = {}
-                
-                data[guild_id_str][user_id_str]['text_xp'] = new_text_xp
-                data[guild_id_str][user_id_str]['voice_xp'] = new_voice_xp
-                self.save_json(self.xp_file, data)
+                self.xp_store.set(member.id, interaction.guild.id, new_text_xp, new_voice_xp)
                 
                 await interaction.response.send_message(
                     f"Fixed {member.mention}'s XP:\n"
@@ -0,0 +1,62 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import math
+
+
+class Status(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # ------------------------------------------------------------------ #
+    #  Helpers                                                            #
+    # ------------------------------------------------------------------ #
+
+    def shard_rows(self) -> list[str]:
+        """One line per shard: state, latency, guild count and events seen."""
+        metrics = self.bot.shard_metrics
+        guild_counts = {}
+        for guild in self.bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+
+        rows = []
+        for shard_id, latency in sorted(self.bot.shard_latencies()):
+            online  = self.bot.is_shard_online(shard_id)
+            ms      = f'{latency * 1000:.0f}ms' if math.isfinite(latency) else 'n/a'
+            rows.append(
+                f'{shard_id:>5}  {"up" if online else "DOWN":<4}  {ms:>7}  '
+                f'{guild_counts.get(shard_id, 0):>6,}  {metrics.total(shard_id):>9,}  '
+                f'{metrics.disconnects[shard_id]:>4}/{metrics.resumes[shard_id]:<4}'
+            )
+        return rows
+
+    # ------------------------------------------------------------------ #
+    #  SLASH COMMANDS                                                     #
+    # ------------------------------------------------------------------ #
+
+    @app_commands.command(
+        name='shard-stats',
+        description='Show latency and event counts for each gateway shard',
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def shard_stats(self, interaction: discord.Interaction):
+        header = 'shard  conn  latency  guilds     events  drop/resume'
+        rows   = self.shard_rows()
+        body   = '\n'.join([header, *rows])
+        if len(body) > 4000:
+            body = body[:4000].rsplit('\n', 1)[0] + '\n...'
+
+        embed = discord.Embed(
+            title='📡 Shard Stats',
+            description=f'```\n{body}\n```',
+            color=0x3498DB,
+        )
+        if interaction.guild:
+            embed.add_field(name='This Server', value=f'Shard `{interaction.guild.shard_id}`', inline=True)
+        embed.add_field(name='Shards', value=f'`{len(rows)}` of `{self.bot.shard_count or 1}`', inline=True)
+        embed.add_field(name='Guildless Events', value=f'`{self.bot.shard_metrics.total(None):,}`', inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Status(bot))
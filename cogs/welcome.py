@@ -1,13 +1,20 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import os
-import json
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import io
-import aiohttp
+from collections import OrderedDict
+from typing import TYPE_CHECKING
 
-from config import WELCOME_IMAGE_SIZE, WELCOME_BACKGROUND_PATH, WELCOME_AVATAR_SIZE
+from config import WELCOME_IMAGE_SIZE, WELCOME_BACKGROUND_PATH, WELCOME_AVATAR_SIZE, WELCOME_LAYER_CACHE_SIZE, PRELOAD_FONTS, WELCOME_CARD_ENCODING
+from utils.assets import get_font, preload_fonts
+from utils.encode import card_filename, encode_image
+from utils.settings_cache import WelcomeSettings, get_settings_cache
+
+# Pillow is imported inside the image methods, on the first card rendered
+if TYPE_CHECKING:
+    from PIL import Image, ImageDraw
 
 # Welcome card palette (BuzzBot gold + Discord-style dark UI)
 _COLOUR_GOLD = (255, 193, 7)
@@ -20,95 +27,48 @@ _RING_WIDTH = 4
 _RING_SEP = 2
 _AVATAR_SUPERSAMPLE = 4
 
-_FONT_REGULAR = [
-    'C:/Windows/Fonts/segoeui.ttf',
-    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-    '/System/Library/Fonts/Supplemental/Arial.ttf',
-    './data/arial.ttf',
-]
-_FONT_BOLD = [
-    'C:/Windows/Fonts/segoeuib.ttf',
-    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
-    '/System/Library/Fonts/Supplemental/Arial Bold.ttf',
-    './data/arialbd.ttf',
-]
+# (face, size) pairs from utils.assets
+_FONT_LABEL = ('ui', 15)
+_FONT_NAME = ('ui-bold', 40)
+_FONT_SERVER = ('ui', 20)
+_FONT_PILL = ('ui', 17)
+WELCOME_FONTS = (_FONT_LABEL, _FONT_NAME, _FONT_SERVER, _FONT_PILL)
 
 
 class Welcome(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_dir = 'data'
-        self.settings_file = os.path.join(self.data_dir, 'welcome_settings.json')
-        self.init_data_files()
+        self.settings = get_settings_cache()
+        self.settings.start_watching()
+        # {(guild_id, background_path, mtime, size): composed static layer}
+        self._layer_cache = OrderedDict()
+        # Also rejects an unknown WELCOME_CARD_ENCODING when the cog loads
+        self.card_filename = card_filename('welcome', WELCOME_CARD_ENCODING)
+
+    async def cog_load(self):
+        if PRELOAD_FONTS:
+            # Cards render on this process, so warm the shared font cache here
+            asyncio.create_task(asyncio.to_thread(preload_fonts, WELCOME_FONTS))
 
     # ------------------------------------------------------------------ #
-    #  Data helpers (mirrors the pattern used in levelling.py)            #
+    #  Data helpers (backed by the shared settings cache)                 #
     # ------------------------------------------------------------------ #
 
-    def init_data_files(self):
-        """Initialise JSON data files."""
-        os.makedirs(self.data_dir, exist_ok=True)
-        if not os.path.exists(self.settings_file):
-            self.save_json(self.settings_file, {})
-
-    def load_json(self, filepath):
-        """Load JSON data from file."""
-        try:
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except (json.JSONDecodeError, IOError):
-            return {}
-
-    def save_json(self, filepath, data):
-        """Save JSON data to file."""
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
-        except IOError:
-            return False
-
-    def get_welcome_settings(self, guild_id):
+    def get_welcome_settings(self, guild_id) -> WelcomeSettings:
         """Get welcome settings for a guild."""
-        data = self.load_json(self.settings_file)
-        guild_id_str = str(guild_id)
-        if guild_id_str in data:
-            return data[guild_id_str]
+        settings = self.settings.get('welcome', guild_id)
+        if settings is not None:
+            return settings
         return {'channel_id': None, 'background_path': WELCOME_BACKGROUND_PATH}
 
     def set_welcome_setting(self, guild_id, key, value):
         """Set a single welcome setting for a guild."""
-        data = self.load_json(self.settings_file)
-        guild_id_str = str(guild_id)
-        if guild_id_str not in data:
-            data[guild_id_str] = {}
-        data[guild_id_str][key] = value
-        self.save_json(self.settings_file, data)
+        self.settings.set('welcome', guild_id, key, value)
 
     # ------------------------------------------------------------------ #
     #  Image generation                                                   #
     # ------------------------------------------------------------------ #
 
-    def _load_font(self, size: int, bold: bool = False) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-        """Load a system font with sensible fallbacks."""
-        cache_key = ('bold' if bold else 'regular', size)
-        if not hasattr(self, '_font_cache'):
-            self._font_cache = {}
-        if cache_key in self._font_cache:
-            return self._font_cache[cache_key]
-
-        for path in (_FONT_BOLD if bold else _FONT_REGULAR):
-            if os.path.exists(path):
-                font = ImageFont.truetype(path, size)
-                self._font_cache[cache_key] = font
-                return font
-
-        font = ImageFont.load_default()
-        self._font_cache[cache_key] = font
-        return font
-
     @staticmethod
     def _truncate(text: str, max_len: int) -> str:
         if len(text) <= max_len:
@@ -116,20 +76,16 @@ class Welcome(commands.Cog):
         return text[: max_len - 3] + '...'
 
     @staticmethod
-    def _text_size(draw: ImageDraw.ImageDraw, text: str, font) -> tuple[int, int]:
+    def _text_size(draw: 'ImageDraw.ImageDraw', text: str, font) -> tuple[int, int]:
         bbox = draw.textbbox((0, 0), text, font=font)
         return bbox[2] - bbox[0], bbox[3] - bbox[1]
 
-    def _create_gradient_background(self, width: int, height: int) -> Image.Image:
+    def _create_gradient_background(self, width: int, height: int) -> 'Image.Image':
         """Dark gradient with a soft gold glow (BuzzBot default)."""
-        img = Image.new('RGB', (width, height))
-        draw = ImageDraw.Draw(img)
-        top = (22, 24, 34)
-        bottom = (10, 11, 18)
-        for y in range(height):
-            t = y / height
-            colour = tuple(int(top[i] + (bottom[i] - top[i]) * t) for i in range(3))
-            draw.line([(0, y), (width, y)], fill=colour)
+        from PIL import Image, ImageDraw
+        from utils.render_primitives import vertical_gradient
+
+        img = vertical_gradient(width, height, (22, 24, 34), (10, 11, 18))
 
         glow = Image.new('RGBA', (width, height), (0, 0, 0, 0))
         glow_draw = ImageDraw.Draw(glow)
@@ -139,8 +95,10 @@ class Welcome(commands.Cog):
         )
         return Image.alpha_composite(img.convert('RGBA'), glow)
 
-    def _load_background(self, width: int, height: int, bg_path: str | None) -> Image.Image:
+    def _load_background(self, width: int, height: int, bg_path: str | None) -> 'Image.Image':
         """Load custom background or fall back to the built-in gradient."""
+        from PIL import Image, ImageFilter
+
         if bg_path and os.path.exists(bg_path):
             try:
                 img = Image.open(bg_path).convert('RGB')
@@ -153,8 +111,10 @@ class Welcome(commands.Cog):
                 pass
         return self._create_gradient_background(width, height)
 
-    def _draw_card_panel(self, base: Image.Image) -> Image.Image:
+    def _draw_card_panel(self, base: 'Image.Image') -> 'Image.Image':
         """Frosted card panel with a gold accent stripe."""
+        from PIL import Image, ImageDraw
+
         width, height = base.size
         margin_x, margin_y = 28, 28
         card_box = [margin_x, margin_y, width - margin_x, height - margin_y]
@@ -176,81 +136,68 @@ class Welcome(commands.Cog):
 
         return Image.alpha_composite(base, panel)
 
-    async def _fetch_avatar(self, member: discord.Member, size: int) -> Image.Image | None:
-        """Download member avatar as RGBA square (masking done when compositing)."""
+    def _get_static_layer(self, guild_id: int, width: int, height: int, bg_path: str | None) -> 'Image.Image':
+        """Background, card panel and decorative rings, rendered once per guild/background.
+
+        The background file's mtime is part of the key, so replacing the image
+        on disk produces a fresh layer without any explicit invalidation.
+        """
         try:
-            async with aiohttp.ClientSession() as session:
-                url = str(member.display_avatar.with_size(256).url)
-                async with session.get(url) as resp:
-                    if resp.status != 200:
-                        return None
-                    avatar_data = await resp.read()
-
-            av = Image.open(io.BytesIO(avatar_data)).convert('RGBA')
-            return av.resize((size, size), Image.Resampling.LANCZOS)
-        except Exception:
-            return None
+            mtime = os.path.getmtime(bg_path) if bg_path else None
+        except OSError:
+            mtime = None
+        key = (guild_id, bg_path, mtime, (width, height))
 
-    @staticmethod
-    def _smooth_circle_mask(diameter: int, supersample: int = _AVATAR_SUPERSAMPLE) -> Image.Image:
-        """Anti-aliased circular alpha mask via supersampling."""
-        hi = diameter * supersample
-        mask = Image.new('L', (hi, hi), 0)
-        inset = max(1, supersample // 2)
-        ImageDraw.Draw(mask).ellipse(
-            (inset, inset, hi - inset, hi - inset),
-            fill=255,
-        )
-        return mask.resize((diameter, diameter), Image.Resampling.LANCZOS)
+        layer = self._layer_cache.get(key)
+        if layer is not None:
+            self._layer_cache.move_to_end(key)
+            return layer
+
+        from PIL import ImageDraw
+
+        layer = self._load_background(width, height, bg_path)
+        layer = self._draw_card_panel(layer)
+        self._draw_decorative_accent(ImageDraw.Draw(layer), width, height)
+
+        self._layer_cache[key] = layer
+        while len(self._layer_cache) > WELCOME_LAYER_CACHE_SIZE:
+            self._layer_cache.popitem(last=False)
+        return layer
+
+    async def _fetch_avatar(self, member: discord.Member, size: int) -> 'Image.Image | None':
+        """Member avatar as an RGBA square (masking done when compositing), decoded once per avatar."""
+        return await self.bot.avatar_cache.fetch_image(self.bot.http_session, member.display_avatar, size)
 
     def _compose_avatar_badge(
         self,
-        avatar: Image.Image | None,
+        avatar: 'Image.Image | None',
         size: int,
-    ) -> Image.Image:
-        """Gold ring + avatar rendered at high resolution for smooth edges."""
-        ss = _AVATAR_SUPERSAMPLE
-        pad = _RING_WIDTH + _RING_SEP
-        total = size + pad * 2
-        hi = total * ss
+    ) -> 'Image.Image':
+        """Gold ring + avatar; the ring and mask are supersampled once per size."""
+        from PIL import Image
+        from utils.render_primitives import circle_mask, ring_badge
 
-        img = Image.new('RGBA', (hi, hi), (0, 0, 0, 0))
-        cx = cy = hi // 2
-        draw = ImageDraw.Draw(img)
-
-        outer_r = hi // 2 - ss
-        ring_w = _RING_WIDTH * ss
-        avatar_hi = size * ss
-        avatar_off = pad * ss
-
-        draw.ellipse(
-            (cx - outer_r, cy - outer_r, cx + outer_r, cy + outer_r),
-            fill=(*_COLOUR_GOLD, 255),
-        )
-        inner_gold_r = outer_r - ring_w
-        draw.ellipse(
-            (cx - inner_gold_r, cy - inner_gold_r, cx + inner_gold_r, cy + inner_gold_r),
-            fill=(24, 26, 32, 255),
-        )
+        pad = _RING_WIDTH + _RING_SEP
+        img = ring_badge(
+            size, _RING_WIDTH, _RING_SEP, (*_COLOUR_GOLD, 255), (24, 26, 32, 255), _AVATAR_SUPERSAMPLE
+        ).copy()
 
-        mask = self._smooth_circle_mask(avatar_hi, ss)
+        mask = circle_mask(size, _AVATAR_SUPERSAMPLE)
         if avatar:
-            av_hi = avatar.resize((avatar_hi, avatar_hi), Image.Resampling.LANCZOS)
-            img.paste(av_hi, (avatar_off, avatar_off), mask)
+            img.paste(avatar.resize((size, size), Image.Resampling.LANCZOS), (pad, pad), mask)
         else:
-            placeholder = Image.new('RGBA', (avatar_hi, avatar_hi), (56, 58, 66, 255))
-            img.paste(placeholder, (avatar_off, avatar_off), mask)
+            img.paste((56, 58, 66, 255), (pad, pad, pad + size, pad + size), mask)
 
-        return img.resize((total, total), Image.Resampling.LANCZOS)
+        return img
 
     def _paste_avatar_with_ring(
         self,
-        base: Image.Image,
-        avatar: Image.Image | None,
+        base: 'Image.Image',
+        avatar: 'Image.Image | None',
         x: int,
         y: int,
         size: int,
-    ) -> Image.Image:
+    ) -> 'Image.Image':
         """Paste supersampled avatar badge onto the card."""
         badge = self._compose_avatar_badge(avatar, size)
         pad = (badge.width - size) // 2
@@ -260,7 +207,7 @@ class Welcome(commands.Cog):
 
     def _draw_decorative_accent(
         self,
-        draw: ImageDraw.ImageDraw,
+        draw: 'ImageDraw.ImageDraw',
         width: int,
         height: int,
         *,
@@ -282,7 +229,7 @@ class Welcome(commands.Cog):
 
     def _draw_text_block(
         self,
-        draw: ImageDraw.ImageDraw,
+        draw: 'ImageDraw.ImageDraw',
         *,
         x: int,
         y: int,
@@ -291,10 +238,10 @@ class Welcome(commands.Cog):
         member_count: int,
     ) -> None:
         """Draw label, username, server line, and member pill."""
-        font_label = self._load_font(15)
-        font_name = self._load_font(40, bold=True)
-        font_server = self._load_font(20)
-        font_pill = self._load_font(17)
+        font_label = get_font(*_FONT_LABEL)
+        font_name = get_font(*_FONT_NAME)
+        font_server = get_font(*_FONT_SERVER)
+        font_pill = get_font(*_FONT_PILL)
 
         draw.text((x, y), 'WELCOME', fill=_COLOUR_GOLD_SOFT, font=font_label)
 
@@ -328,15 +275,17 @@ class Welcome(commands.Cog):
         )
 
     async def generate_welcome_card(self, member: discord.Member) -> io.BytesIO:
-        """Generate and return the welcome card as a PNG byte stream."""
+        """Generate and return the welcome card as a byte stream encoded as WELCOME_CARD_ENCODING."""
+        from PIL import ImageDraw
+
         width, height = WELCOME_IMAGE_SIZE
         avatar_size = WELCOME_AVATAR_SIZE
 
         settings = self.get_welcome_settings(member.guild.id)
         bg_path = settings.get('background_path', WELCOME_BACKGROUND_PATH)
 
-        img = self._load_background(width, height, bg_path)
-        img = self._draw_card_panel(img)
+        # Shared layer; _paste_avatar_with_ring draws onto a converted copy
+        img = self._get_static_layer(member.guild.id, width, height, bg_path)
 
         margin_x, margin_y = 28, 28
         ring_pad = _RING_WIDTH + _RING_SEP
@@ -365,12 +314,8 @@ class Welcome(commands.Cog):
             server_name=server_name,
             member_count=member_count,
         )
-        self._draw_decorative_accent(draw, width, height)
 
-        buf = io.BytesIO()
-        img.convert('RGB').save(buf, format='PNG')
-        buf.seek(0)
-        return buf
+        return io.BytesIO(encode_image(img.convert('RGB'), WELCOME_CARD_ENCODING))
 
     # ------------------------------------------------------------------ #
     #  Event listener                                                     #
@@ -390,7 +335,7 @@ class Welcome(commands.Cog):
 
         try:
             card = await self.generate_welcome_card(member)
-            file = discord.File(card, filename='welcome.png')
+            file = discord.File(card, filename=self.card_filename)
             await channel.send(
                 content=f'Welcome to **{member.guild.name}**, {member.mention}! 👋',
                 file=file,
@@ -476,7 +421,7 @@ class Welcome(commands.Cog):
         await interaction.response.defer(ephemeral=True)
         try:
             card = await self.generate_welcome_card(target)
-            file = discord.File(card, filename='welcome.png')
+            file = discord.File(card, filename=self.card_filename)
             await channel.send(
                 content=f'Welcome to **{interaction.guild.name}**, {target.mention}! 👋',
                 file=file,
@@ -10,4 +10,50 @@ TIME_WINDOW = 10
 # Recommended image size: 900x320 pixels (banner aspect ratio)
 WELCOME_IMAGE_SIZE = (900, 320)        # Width x Height
 WELCOME_BACKGROUND_PATH = './data/welcome_bg.png'  # Customise this path
-WELCOME_AVATAR_SIZE = 120              # Avatar circle diameter in pixels
\ No newline at end of file
+WELCOME_AVATAR_SIZE = 120              # Avatar circle diameter in pixels
+
+# Storage Settings
+XP_FLUSH_INTERVAL = 30                 # Seconds between write-behind flushes of in-memory XP data
+STORAGE_BACKEND = 'json'               # 'json' (flat files in ./data) or 'sqlite'
+SQLITE_PATH = './data/buzzbot.db'      # Database used by the sqlite backend; existing JSON data is imported on first start
+XP_JOURNAL_PATH = './data/xp_journal.bin'  # Append-only log of XP changes; None writes full snapshots instead
+XP_COMPACT_INTERVAL = 10 * 60          # Seconds between folding the XP journal into a storage snapshot
+XP_JOURNAL_MAX_BYTES = 8 * 1024 * 1024  # Fold the journal early once it grows past this size
+
+# Rendering Settings
+RENDER_EXECUTOR = 'thread'             # 'thread' (Pillow releases the GIL) or 'process' for a ProcessPoolExecutor
+RENDER_WORKERS = 2                     # Worker threads/processes used for card rendering
+PRELOAD_FONTS = True                   # Load the fonts the cards use in a render worker at startup instead of on the first card
+RANK_CARD_CACHE_MAX_BYTES = 8 * 1024 * 1024  # Memory budget for finished rank card PNGs reused by /rank
+RANK_CARD_ENCODING = 'png'            # 'png', 'png-fast', 'png-palette' or 'webp' (see utils/encode.py, benchmarks/bench_encoding.py)
+WELCOME_CARD_ENCODING = 'png'         # Same choices; 'png-palette' is not recommended for photo backgrounds
+
+# HTTP Settings
+HTTP_CONNECTION_LIMIT = 50             # Max open connections in the shared aiohttp session
+HTTP_CONNECTION_LIMIT_PER_HOST = 10    # Max open connections per host (e.g. the Discord CDN)
+AVATAR_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Memory budget for cached avatar images
+AVATAR_CACHE_TTL = 30 * 60             # Seconds before a cached avatar is re-downloaded
+AVATAR_IMAGE_CACHE_MAX_BYTES = 16 * 1024 * 1024  # Memory budget for decoded (and resized) avatars, measured uncompressed
+WELCOME_LAYER_CACHE_SIZE = 32          # Pre-rendered welcome card backgrounds kept in memory (one per guild/background)
+
+# Level-Up Announcements
+LEVEL_UP_BATCH_WINDOW = 3.0            # Seconds to collect level-ups before sending them as one message
+SETTINGS_WATCH_INTERVAL = 10           # Seconds between checks for hand-edited settings files (0 disables)
+
+# Audit Log Settings
+AUDIT_BATCH_DELAY = 2.0                # Seconds to wait for more events before sending a partial batch of embeds
+AUDIT_QUEUE_LIMIT = 200                # Max queued embeds per log channel before the oldest are dropped and summarised
+AUDIT_ENTRY_MAX_AGE = 15               # Seconds an audit log entry is considered fresh enough to attribute an event
+AUDIT_ENTRY_WAIT = 0.5                 # Seconds a listener waits for its audit log entry to arrive
+AUDIT_CLOCK_SKEW = 2.0                 # Seconds an entry may predate the event it explains (clock drift, dispatch delay)
+AUDIT_FETCH_LIMIT = 25                 # Entries fetched per REST call when the gateway isn't delivering audit entries
+MESSAGE_CACHE_PER_GUILD = 5000         # Recent messages per guild kept (content only) for edit/delete logs
+
+# Sharding Settings
+# SHARD_COUNT and SHARD_IDS (comma-separated, e.g. "0,1") in the environment override these
+SHARDING = False                       # Run as an AutoShardedBot; Discord recommends the shard count unless SHARD_COUNT is set
+SHARD_COUNT = None                     # Total shards across every process (None lets Discord decide)
+SHARD_IDS = None                       # Shards this process runs, e.g. [0, 1] (None runs all of them; needs SHARD_COUNT)
+
+# Startup Settings
+COMMAND_TREE_HASH_PATH = './data/command_tree_hash'  # Hash of the last synced slash commands; delete it to force a sync
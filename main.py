@@ -1,43 +1,147 @@
 import discord
 from discord.ext import commands
 import asyncio
+import hashlib
+import json
 import os
+import time
 from dotenv import load_dotenv
+
+from config import COMMAND_TREE_HASH_PATH
+from utils.http import AvatarCache, create_http_session
+from utils.render_pool import shutdown_render_executor
+from utils.shards import ShardMetrics, shard_options
+from utils.storage import get_storage
 load_dotenv()
 
+STARTED_AT = time.perf_counter()
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.voice_states = True
 
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+SHARDED, SHARD_COUNT, SHARD_IDS = shard_options()
+BotBase = commands.AutoShardedBot if SHARDED else commands.Bot
+
+
+class BuzzBot(BotBase):
+    """Bot that owns the resources shared by every cog."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_session = None
+        self.avatar_cache = AvatarCache()
+        self.shard_metrics = ShardMetrics()
+
+    def dispatch(self, event_name, /, *args, **kwargs):
+        if event_name.startswith('shard_') and args and isinstance(args[0], int):
+            shard_id = args[0]
+        else:
+            guild_id = ShardMetrics.guild_id_of(args)
+            shard_id = None if guild_id is None else self.shard_for(guild_id)
+        self.shard_metrics.record(shard_id, event_name)
+        super().dispatch(event_name, *args, **kwargs)
+
+    def shard_for(self, guild_id):
+        """Return the shard a guild is served by"""
+        return (guild_id >> 22) % (self.shard_count or 1)
+
+    def shard_latencies(self):
+        """Return [(shard_id, latency in seconds)] for the shards this process runs"""
+        if SHARDED:
+            return self.latencies
+        return [(self.shard_id or 0, self.latency)]
+
+    def is_shard_online(self, shard_id):
+        """Return True if the shard's gateway connection is currently open"""
+        if SHARDED:
+            shard = self.get_shard(shard_id)
+            return shard is not None and not shard.is_closed()
+        return self.ws is not None and self.ws.open
+
+    async def setup_hook(self):
+        self.http_session = create_http_session()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(self.load_cog(cog) for cog in COGS))
+        loaded = time.perf_counter()
+        print(f'Loaded {len(self.extensions)}/{len(COGS)} cog(s) in {loaded - started:.2f}s')
+
+        await self.sync_commands_if_changed()
+        print(f'Command sync check took {time.perf_counter() - loaded:.2f}s')
+
+    async def load_cog(self, cog):
+        try:
+            await self.load_extension(cog)
+            cog_name = cog.split('.')[-1].replace('_', ' ').title()
+            print(f'{cog_name} cog loaded successfully!')
+        except Exception as e:
+            print(f'Failed to load {cog}: {e}')
+
+    def command_tree_hash(self):
+        """Hash of the global command payloads Discord would receive from a sync"""
+        payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands()),
+            key=lambda command: (command.get('type', 1), command['name']),
+        )
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def sync_commands_if_changed(self):
+        """Sync slash commands only when they differ from the last successful sync"""
+        current = self.command_tree_hash()
+        try:
+            with open(COMMAND_TREE_HASH_PATH, 'r', encoding='utf-8') as f:
+                previous = f.read().strip()
+        except OSError:
+            previous = None
+
+        if current == previous:
+            print('Slash commands unchanged, skipping sync')
+            return
+
+        try:
+            synced = await self.tree.sync()
+            print(f'Synced {len(synced)} command(s)')
+        except Exception as e:
+            print(f'Failed to sync commands: {e}')
+            return
+
+        try:
+            os.makedirs(os.path.dirname(COMMAND_TREE_HASH_PATH) or '.', exist_ok=True)
+            with open(COMMAND_TREE_HASH_PATH, 'w', encoding='utf-8') as f:
+                f.write(current)
+        except OSError as e:
+            print(f'Failed to save command tree hash: {e}')
+
+    async def close(self):
+        await super().close()
+        # Cogs flush their data on unload; let the background writes land
+        await get_storage().drain()
+        if self.http_session:
+            await self.http_session.close()
+        shutdown_render_executor()
+
+
+if SHARDED:
+    bot = BuzzBot(command_prefix='!', intents=intents, help_command=None,
+                  shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+else:
+    bot = BuzzBot(command_prefix='!', intents=intents, help_command=None)
 
 
 COGS = [
     'cogs.levelling',
     'cogs.welcome',
     'cogs.audit_log',
+    'cogs.status',
     'cogs.help',
 ]
 
 @bot.event
 async def on_ready():
-    print(f'{bot.user} has logged in!')
-
-    for cog in COGS:
-        try:
-            await bot.load_extension(cog)
-            cog_name = cog.split('.')[-1].replace('_', ' ').title()
-            print(f'{cog_name} cog loaded successfully!')
-        except Exception as e:
-            print(f'Failed to load {cog}: {e}')
-
-    # Sync slash commands
-    try:
-        synced = await bot.tree.sync()
-        print(f'Synced {len(synced)} command(s)')
-    except Exception as e:
-        print(f'Failed to sync commands: {e}')
+    # Fires again after every reconnect; cogs and commands are set up once in setup_hook
+    print(f'{bot.user} has logged in! (ready {time.perf_counter() - STARTED_AT:.2f}s after start)')
 
 if __name__ == '__main__':
     token = os.getenv('BOT_TOKEN')
@@ -46,4 +150,3 @@ if __name__ == '__main__':
         print("Please create a .env file with BOT_TOKEN=your_token_here")
     else:
         bot.run(token)
-
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from utils.levels import LEVEL_THRESHOLDS, MAX_LEVEL, level_for_xp, xp_for_level, xp_in_level
+
+
+# The level calculation as it was before the threshold table, kept verbatim as the reference
+
+def reference_xp_for_level(level):
+    if level <= 0:
+        return 0
+    return int((level / 0.55) ** (1 / 0.55) * 100)
+
+
+def reference_level(xp):
+    if xp <= 0:
+        return 0
+    level = 0
+    while True:
+        xp_needed = reference_xp_for_level(level + 1)
+        if xp_needed > xp:
+            return level
+        level += 1
+        if level > 10000:
+            return level
+
+
+def reference_xp_in_level(xp, level):
+    xp_for_current_level = reference_xp_for_level(level)
+    xp_for_next_level = reference_xp_for_level(level + 1)
+    return max(0, xp - xp_for_current_level), max(1, xp_for_next_level - xp_for_current_level)
+
+
+# The reference loop is O(level), so every threshold is checked densely at low
+# levels (where nearly all real users are) and at a stride above that
+CHECKED_LEVELS = sorted({*range(1, 1501), *range(1501, MAX_LEVEL + 2, 25), MAX_LEVEL - 1, MAX_LEVEL, MAX_LEVEL + 1})
+
+
+def test_xp_for_level_matches_reference():
+    for level in range(-2, MAX_LEVEL + 3):
+        assert xp_for_level(level) == reference_xp_for_level(level)
+
+
+def test_thresholds_are_strictly_increasing():
+    assert len(LEVEL_THRESHOLDS) == MAX_LEVEL
+    assert all(a < b for a, b in zip(LEVEL_THRESHOLDS, LEVEL_THRESHOLDS[1:]))
+
+
+@pytest.mark.parametrize('xp', [-100, -1, 0, 1, 2, 99, 100])
+def test_small_and_negative_xp(xp):
+    assert level_for_xp(xp) == reference_level(xp)
+
+
+def test_every_checked_threshold_plus_minus_one():
+    for level in CHECKED_LEVELS:
+        threshold = reference_xp_for_level(level)
+        for xp in (threshold - 1, threshold, threshold + 1):
+            assert level_for_xp(xp) == reference_level(xp), (level, xp)
+
+
+def test_every_threshold_plus_minus_one_brackets():
+    # With strictly increasing thresholds (tested above) the reference loop
+    # returns the L with xp_for_level(L) <= xp < xp_for_level(L + 1), capped at
+    # MAX_LEVEL; this checks that bracket at every level without the O(L) loop
+    for level in range(1, MAX_LEVEL + 2):
+        threshold = reference_xp_for_level(level)
+        for xp in (threshold - 1, threshold, threshold + 1):
+            expected = level if xp >= threshold else level - 1
+            if reference_xp_for_level(expected + 1) <= xp:
+                expected += 1
+            assert level_for_xp(xp) == min(expected, MAX_LEVEL), (level, xp)
+
+
+def test_random_xp_up_to_past_the_cap():
+    rng = random.Random(1234)
+    top = reference_xp_for_level(MAX_LEVEL + 1) * 2
+    for xp in [rng.randint(0, 5_000_000) for _ in range(2000)] + [rng.randint(0, top) for _ in range(300)]:
+        assert level_for_xp(xp) == reference_level(xp), xp
+
+
+def test_xp_in_level_matches_reference():
+    rng = random.Random(5678)
+    for xp in [rng.randint(0, 5_000_000) for _ in range(2000)]:
+        level = level_for_xp(xp)
+        assert xp_in_level(xp, level) == reference_xp_in_level(xp, level)
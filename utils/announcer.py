@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+from config import LEVEL_UP_BATCH_WINDOW
+
+MESSAGE_LIMIT = 2000       # Discord's max message length
+CHANNEL_RATE = (5, 5.0)    # Discord allows roughly 5 messages per 5 seconds per channel
+
+
+class LevelUpAnnouncer:
+    """Collects level-up announcements per level channel and sends them in batches.
+
+    The first announcement for a channel opens a window of `window` seconds;
+    everything queued for that channel during the window goes out as one
+    message (split only when it would exceed Discord's length limit). Sends
+    are paced to stay under the per-channel rate limit instead of relying on
+    429 retries.
+    """
+
+    def __init__(self, window=LEVEL_UP_BATCH_WINDOW):
+        self.window = window
+        self.pending = {}   # {channel_id: (channel, [announcement text])}
+        self.tasks = {}     # {channel_id: asyncio.Task} flushers currently waiting/sending
+        self.sent_at = {}   # {channel_id: deque of recent send times}
+        self.sending = {}   # {channel_id: (channel, deque of (content, texts packed into it))} not yet sent
+        self.announcements = 0
+        self.delivered = 0  # announcements whose message has been sent
+        self.messages_sent = 0
+        self.failed = 0     # messages Discord refused; their announcements were not delivered
+
+    def announce(self, channel, text):
+        """Queue an announcement; it is sent when the channel's window closes"""
+        self.announcements += 1
+        entry = self.pending.get(channel.id)
+        if entry is None:
+            entry = self.pending[channel.id] = (channel, [])
+        entry[1].append(text)
+        if channel.id not in self.tasks:
+            self.tasks[channel.id] = asyncio.create_task(self._run(channel.id))
+
+    async def _run(self, channel_id):
+        try:
+            # Keep going while announcements arrive during a send
+            while channel_id in self.pending:
+                await asyncio.sleep(self.window)
+                channel, texts = self.pending.pop(channel_id)
+                await self._send_all(channel, texts)
+        finally:
+            self.tasks.pop(channel_id, None)
+
+    async def _send_all(self, channel, texts):
+        # Packed messages stay in self.sending until sent, so close() can
+        # finish a flusher that was cancelled part-way through
+        outbox = deque(self._pack(texts))
+        self.sending[channel.id] = (channel, outbox)
+        await self._send_outbox(channel, outbox)
+        if self.sending.get(channel.id, (None, None))[1] is outbox:
+            del self.sending[channel.id]
+
+    async def _send_outbox(self, channel, outbox):
+        while outbox:
+            content, count = outbox[0]
+            await self._wait_for_rate_limit(channel.id)
+            try:
+                await channel.send(content)
+            except (discord.Forbidden, discord.HTTPException):
+                self.failed += 1
+            else:
+                self.messages_sent += 1
+                self.delivered += count
+            outbox.popleft()
+
+    @staticmethod
+    def _pack(texts):
+        """Join announcements into as few messages as the length limit allows; returns [(content, count)]"""
+        messages = []
+        current = ''
+        count = 0
+        for text in texts:
+            if current and len(current) + 1 + len(text) > MESSAGE_LIMIT:
+                messages.append((current, count))
+                current = ''
+                count = 0
+            current = f'{current}\n{text}' if current else text[:MESSAGE_LIMIT]
+            count += 1
+        if current:
+            messages.append((current, count))
+        return messages
+
+    async def _wait_for_rate_limit(self, channel_id):
+        limit, per = CHANNEL_RATE
+        sent = self.sent_at.setdefault(channel_id, deque(maxlen=limit))
+        if len(sent) == limit:
+            wait = per - (time.monotonic() - sent[0])
+            if wait > 0:
+                await asyncio.sleep(wait)
+        sent.append(time.monotonic())
+
+    async def close(self):
+        """Cancel the windows and send whatever is still queued or half-sent"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # A message interrupted mid-send is sent again rather than risk losing it
+        sending, self.sending = self.sending, {}
+        for channel, outbox in sending.values():
+            await self._send_outbox(channel, outbox)
+        pending, self.pending = self.pending, {}
+        for channel, texts in pending.values():
+            await self._send_all(channel, texts)
+
+    def stats(self):
+        return {
+            'announcements': self.announcements,
+            'queued': sum(len(texts) for _, texts in self.pending.values()),
+            'in_flight': sum(count for _, outbox in self.sending.values() for _, count in outbox),
+            'messages_sent': self.messages_sent,
+            'messages_saved': self.delivered - self.messages_sent,
+            'failed': self.failed,
+        }
@@ -0,0 +1,59 @@
+import os
+import threading
+
+# Candidate files for each font face, first existing one wins
+FONT_FACES = {
+    'arial': (
+        './data/arial.ttf',
+    ),
+    'ui': (
+        'C:/Windows/Fonts/segoeui.ttf',
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+        '/System/Library/Fonts/Supplemental/Arial.ttf',
+        './data/arial.ttf',
+    ),
+    'ui-bold': (
+        'C:/Windows/Fonts/segoeuib.ttf',
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+        '/System/Library/Fonts/Supplemental/Arial Bold.ttf',
+        './data/arialbd.ttf',
+    ),
+}
+
+_fonts = {}  # {(face, size): FreeTypeFont}, shared by every renderer in this process
+_fonts_lock = threading.Lock()
+
+
+def get_font(face, size):
+    """Return the font for a face at a size, loading it on first use.
+
+    Pillow is only imported here, the first time a font is needed, so
+    importing the cogs doesn't pull in the imaging stack.
+    """
+    key = (face, size)
+    font = _fonts.get(key)
+    if font is None:
+        with _fonts_lock:
+            font = _fonts.get(key)
+            if font is None:
+                font = _fonts[key] = _load_font(face, size)
+    return font
+
+
+def _load_font(face, size):
+    from PIL import ImageFont
+
+    for path in FONT_FACES[face]:
+        if os.path.exists(path):
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError:
+                continue
+    return ImageFont.load_default()
+
+
+def preload_fonts(fonts):
+    """Load the given (face, size) pairs ahead of the first render; returns how many are cached"""
+    for face, size in fonts:
+        get_font(face, size)
+    return len(_fonts)
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import tempfile
+
+
+def atomic_write_json(filepath, data):
+    """Write JSON to a temp file beside filepath and swap it in with os.replace
+
+    Readers (and a crash at any point) see either the old file or the new
+    one, never a truncated mix of both.
+    """
+    directory = os.path.dirname(filepath) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(filepath), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class AsyncJSONWriter:
+    """Serialises and writes JSON files on an executor thread, one writer per path.
+
+    save() never blocks the event loop. While a path is being written, newer
+    saves for it replace each other in a single pending slot, so a burst of
+    saves costs at most two writes and the file always ends at the newest
+    data. Callers must hand over data they will not mutate afterwards.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor  # None uses the loop's default thread pool
+        self.pending = {}   # {path: (data, [futures waiting on that data])}
+        self.latest = {}    # {path: newest data not yet on disk}
+        self.tasks = {}     # {path: asyncio.Task}
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def save(self, filepath, data):
+        """Schedule data to be written to filepath; returns a future resolving to True/False"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = self.pending.get(filepath)
+        if entry is not None:
+            self.coalesced += 1
+            futures = entry[1]
+        else:
+            futures = []
+        futures.append(future)
+        self.pending[filepath] = (data, futures)
+        self.latest[filepath] = data
+        if filepath not in self.tasks:
+            self.tasks[filepath] = asyncio.create_task(self._run(filepath))
+        return future
+
+    def get_latest(self, filepath):
+        """Return data saved for filepath that hasn't reached the disk yet, or None"""
+        return self.latest.get(filepath)
+
+    async def _run(self, filepath):
+        loop = asyncio.get_running_loop()
+        try:
+            while filepath in self.pending:
+                data, futures = self.pending.pop(filepath)
+                try:
+                    await loop.run_in_executor(self.executor, atomic_write_json, filepath, data)
+                    ok = True
+                    self.writes += 1
+                except (OSError, TypeError, ValueError) as e:
+                    print(f'Failed to write {filepath}: {e}')
+                    ok = False
+                    self.failures += 1
+                if self.latest.get(filepath) is data:
+                    del self.latest[filepath]
+                for future in futures:
+                    if not future.done():
+                        future.set_result(ok)
+        finally:
+            self.tasks.pop(filepath, None)
+
+    async def drain(self):
+        """Wait until every scheduled write has finished; returns False if any of them failed"""
+        failures = self.failures
+        while self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        return self.failures == failures
+
+    def stats(self):
+        return {
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'in_flight': len(self.tasks),
+        }
@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from config import AUDIT_CLOCK_SKEW, AUDIT_ENTRY_MAX_AGE, AUDIT_ENTRY_WAIT, AUDIT_FETCH_LIMIT
+
+
+class AuditEntryCache:
+    """Recent audit log entries per guild, indexed by (action, target_id).
+
+    Entries are fed by the gateway's audit_log_entry_create event, so a
+    listener that wants to know who banned/kicked/updated a member just looks
+    the entry up locally, waiting briefly if the event hasn't arrived yet.
+    Only entries created at or after the event (less `skew`) are accepted,
+    so a second moderator's change to the same member isn't credited to
+    whoever made the previous one.
+
+    Guilds that have never delivered a gateway entry (missing intent or a
+    quiet guild since startup) fall back to REST: one unfiltered fetch per
+    guild at a time, shared by every listener waiting on that guild, and its
+    results are cached like gateway entries.
+    """
+
+    def __init__(self, max_age=AUDIT_ENTRY_MAX_AGE, wait=AUDIT_ENTRY_WAIT, fetch_limit=AUDIT_FETCH_LIMIT,
+                 skew=AUDIT_CLOCK_SKEW):
+        self.max_age = max_age
+        self.skew = skew
+        self.wait = wait
+        self.fetch_limit = fetch_limit
+        self.entries = {}       # {guild_id: {(action, target_id | None): newest entry}}
+        self.waiters = {}       # {(guild_id, action, target_id | None): [asyncio.Future]}
+        self.streaming = set()  # guild ids that have delivered an entry over the gateway
+        self.fetches = {}       # {guild_id: asyncio.Task} REST fallbacks in flight
+        self.hits = 0
+        self.misses = 0
+        self.rest_fetches = 0
+
+    def add(self, entry, from_gateway=True):
+        """Index an entry and wake any listener waiting for it"""
+        guild_id = entry.guild.id
+        if from_gateway:
+            self.streaming.add(guild_id)
+        # Listeners credit entry.user; an uncached moderator is no better than no entry
+        if entry.user is None:
+            return
+
+        guild_entries = self.entries.setdefault(guild_id, {})
+        if len(guild_entries) > 64:
+            self._prune(guild_entries)
+
+        target_id = getattr(entry.target, 'id', None)
+        for key in {(entry.action, target_id), (entry.action, None)}:
+            current = guild_entries.get(key)
+            if current is None or current.id < entry.id:
+                guild_entries[key] = entry
+            for future in self.waiters.pop((guild_id, *key), ()):
+                if not future.done():
+                    future.set_result(entry)
+
+    def lookup(self, guild_id, action, target_id=None, since=None):
+        """Return the newest fresh entry for (action, target_id) created at or after `since`, or None"""
+        entry = self.entries.get(guild_id, {}).get((action, target_id))
+        if entry is None or self._age(entry) > self.max_age:
+            return None
+        if since is not None and entry.created_at < since:
+            return None
+        return entry
+
+    async def get(self, guild: discord.Guild, action: discord.AuditLogAction, target_id: int = None, wait: float = None):
+        """Return the entry for an event that just happened, waiting up to `wait` seconds for it"""
+        # Anything older than the event belongs to an earlier action on the same target
+        since = datetime.now(timezone.utc) - timedelta(seconds=self.skew)
+        entry = self.lookup(guild.id, action, target_id, since)
+        if entry is None:
+            entry = await self._wait_for(guild.id, action, target_id, since, self.wait if wait is None else wait)
+        if entry is None and guild.id not in self.streaming:
+            await self._fetch(guild)
+            entry = self.lookup(guild.id, action, target_id, since)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def _wait_for(self, guild_id, action, target_id, since, timeout):
+        if timeout <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        key = (guild_id, action, target_id)
+        # A REST fallback for another listener can wake us with an older entry; keep waiting
+        while (remaining := deadline - loop.time()) > 0:
+            future = loop.create_future()
+            self.waiters.setdefault(key, []).append(future)
+            try:
+                entry = await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                waiting = self.waiters.get(key)
+                if waiting and future in waiting:
+                    waiting.remove(future)
+                    if not waiting:
+                        del self.waiters[key]
+            if entry.created_at >= since:
+                return entry
+        return None
+
+    async def _fetch(self, guild):
+        task = self.fetches.get(guild.id)
+        if task is None:
+            task = self.fetches[guild.id] = asyncio.create_task(self._fetch_recent(guild))
+        await asyncio.shield(task)
+
+    async def _fetch_recent(self, guild):
+        self.rest_fetches += 1
+        try:
+            async for entry in guild.audit_logs(limit=self.fetch_limit):
+                self.add(entry, from_gateway=False)
+        except (discord.Forbidden, discord.HTTPException):
+            pass
+        finally:
+            self.fetches.pop(guild.id, None)
+
+    def _prune(self, guild_entries):
+        for key in [key for key, entry in guild_entries.items() if self._age(entry) > self.max_age]:
+            del guild_entries[key]
+
+    @staticmethod
+    def _age(entry):
+        return (datetime.now(timezone.utc) - entry.created_at).total_seconds()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'rest_fetches': self.rest_fetches,
+            'streaming_guilds': len(self.streaming),
+        }
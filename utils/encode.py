@@ -0,0 +1,40 @@
+import io
+
+# {encoding: (file extension, Pillow format, save options)}
+ENCODINGS = {
+    # Pillow's defaults (zlib level 6), what the cards have always used
+    'png': ('png', 'PNG', {}),
+    # Same pixels, much less time in zlib for a somewhat larger file
+    'png-fast': ('png', 'PNG', {'compress_level': 1}),
+    # Reduced to a 256-colour palette first; the flat-colour rank card looks
+    # the same at about a third of the size, for roughly the default's encode time
+    'png-palette': ('png', 'PNG', {'optimize': True}),
+    # Lossy WebP; small for photo backgrounds too, Discord previews it like a PNG
+    'webp': ('webp', 'WEBP', {'quality': 90, 'method': 4}),
+}
+
+PALETTE_COLOURS = 256
+
+
+def check_encoding(encoding):
+    """Raise ValueError for an encoding name that isn't in ENCODINGS"""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown image encoding {encoding!r}; expected one of {', '.join(ENCODINGS)}")
+
+
+def card_filename(stem, encoding):
+    """Attachment filename for a card saved with encoding, e.g. rank.webp"""
+    check_encoding(encoding)
+    return f'{stem}.{ENCODINGS[encoding][0]}'
+
+
+def encode_image(img, encoding='png'):
+    """Encode a Pillow image with one of ENCODINGS and return the bytes"""
+    check_encoding(encoding)
+    _, fmt, options = ENCODINGS[encoding]
+    if encoding == 'png-palette':
+        from PIL import Image
+        img = img.convert('RGB').quantize(PALETTE_COLOURS, method=Image.Quantize.FASTOCTREE)
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **options)
+    return buf.getvalue()
@@ -0,0 +1,103 @@
+import asyncio
+
+import aiohttp
+
+import io
+
+from config import HTTP_CONNECTION_LIMIT, HTTP_CONNECTION_LIMIT_PER_HOST, AVATAR_CACHE_MAX_BYTES, AVATAR_CACHE_TTL
+from config import AVATAR_IMAGE_CACHE_MAX_BYTES
+from utils.cache import ByteLRUCache
+
+AVATAR_FETCH_SIZE = 256  # Every card asks the CDN for this size so cogs share cache entries
+
+
+def create_http_session():
+    """Create the bot-wide aiohttp session with bounded connection pools"""
+    connector = aiohttp.TCPConnector(limit=HTTP_CONNECTION_LIMIT, limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=15))
+
+
+class AvatarCache:
+    """Downloaded avatar images keyed by (avatar hash, size).
+
+    Avatar URLs are content-addressed by their hash, so an entry only goes
+    stale when Discord drops the asset; the TTL simply bounds how long unused
+    avatars linger. Concurrent requests for the same avatar (e.g. a join wave
+    or repeated /rank) share a single download.
+
+    Encoded bytes are what the render pool is handed (they pickle cheaply
+    into a worker process). Renderers on the event loop's side, like the
+    welcome card, use fetch_image() instead, which keeps decoded RGBA
+    images in a second LRU sized by their uncompressed bytes.
+    """
+
+    def __init__(self, max_bytes=AVATAR_CACHE_MAX_BYTES, ttl=AVATAR_CACHE_TTL,
+                 image_max_bytes=AVATAR_IMAGE_CACHE_MAX_BYTES):
+        self.cache = ByteLRUCache(max_bytes, ttl)
+        self.images = ByteLRUCache(image_max_bytes, ttl, sizeof=_image_size)
+        self.pending = {}  # {key: asyncio.Task} downloads in flight
+
+    async def fetch(self, session, asset, size=AVATAR_FETCH_SIZE):
+        """Return the avatar's image bytes at the given size, or None if it can't be fetched"""
+        key = (asset.key, size)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._download(session, str(asset.with_size(size).url)))
+            self.pending[key] = task
+            try:
+                data = await asyncio.shield(task)
+            finally:
+                del self.pending[key]
+            if data is not None:
+                self.cache.put(key, data)
+            return data
+
+        return await asyncio.shield(task)
+
+    async def fetch_image(self, session, asset, resize_to=None):
+        """Return the avatar decoded to RGBA (resized to a square of resize_to), or None.
+
+        The image is shared with other callers: paste or copy it, never draw on it.
+        """
+        key = (asset.key, resize_to)
+        image = self.images.get(key)
+        if image is not None:
+            return image
+        data = await self.fetch(session, asset)
+        if data is None:
+            return None
+        image = await asyncio.to_thread(_decode_avatar, data, resize_to)
+        if image is not None:
+            self.images.put(key, image)
+        return image
+
+    @staticmethod
+    async def _download(session, url):
+        try:
+            async with session.get(url) as resp:
+                if resp.status != 200:
+                    return None
+                return await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+
+
+def _decode_avatar(data, resize_to):
+    # Pillow is only imported once an avatar is actually decoded
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(data)).convert('RGBA')
+        if resize_to is not None:
+            image = image.resize((resize_to, resize_to), Image.Resampling.LANCZOS)
+        return image
+    except Exception:
+        return None
+
+
+def _image_size(image):
+    return image.width * image.height * len(image.getbands())
@@ -0,0 +1,48 @@
+from sortedcontainers import SortedList
+
+XP_KEYS = ('text_xp', 'voice_xp')
+
+
+class GuildLeaderboard:
+    """Ranked view of one guild's XP, kept in step with every XP change.
+
+    Each XP type has its own SortedList of (-xp, user_id), so the best rank is
+    index 0, ties are broken by user ID, and users with 0 XP are left out (as
+    /top has always done). Updates, page reads and position lookups are all
+    O(log n) plus the size of the page.
+    """
+
+    def __init__(self, users=None):
+        self.ranks = {xp_key: SortedList() for xp_key in XP_KEYS}
+        if users:
+            for xp_key, ranked in self.ranks.items():
+                ranked.update(
+                    (-xp, int(user_id_str))
+                    for user_id_str, xp_data in users.items() if isinstance(xp_data, dict)
+                    for xp in (max(0, int(xp_data.get(xp_key, 0))),) if xp > 0
+                )
+
+    def update(self, user_id, old_xp, new_xp):
+        """Move a user from their old (text_xp, voice_xp) to the new totals"""
+        for xp_key, old, new in zip(XP_KEYS, old_xp, new_xp):
+            if old == new:
+                continue
+            ranked = self.ranks[xp_key]
+            if old > 0:
+                ranked.discard((-old, user_id))
+            if new > 0:
+                ranked.add((-new, user_id))
+
+    def page(self, xp_key, start, count):
+        """Return [(user_id, xp)] for ranks start + 1 .. start + count"""
+        return [(user_id, -neg_xp) for neg_xp, user_id in self.ranks[xp_key].islice(start, start + count)]
+
+    def position(self, xp_key, user_id, xp):
+        """Return (rank, total ranked users), or (None, total) if the user has no XP"""
+        ranked = self.ranks[xp_key]
+        if xp <= 0:
+            return None, len(ranked)
+        return ranked.index((-xp, user_id)) + 1, len(ranked)
+
+    def size(self, xp_key):
+        return len(self.ranks[xp_key])
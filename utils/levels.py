@@ -0,0 +1,36 @@
+from bisect import bisect_right
+
+MAX_LEVEL = 10001  # calculate_level has always stopped counting here
+
+
+def xp_for_level(level):
+    """Calculate XP required to reach a specific level"""
+    if level <= 0:
+        return 0
+    # ProBot formula: XP = (level / 0.55) ^ (1 / 0.55) * 100
+    return int((level / 0.55) ** (1 / 0.55) * 100)
+
+
+# LEVEL_THRESHOLDS[i] is the XP needed to reach level i + 1. The formula is
+# monotonic, so the number of thresholds <= xp is exactly the level the old
+# "count up until the next level is out of reach" loop returned, including its
+# cap at MAX_LEVEL.
+LEVEL_THRESHOLDS = tuple(xp_for_level(level) for level in range(1, MAX_LEVEL + 1))
+
+
+def level_for_xp(xp):
+    """Calculate level from XP (ProBot formula) in O(log MAX_LEVEL)"""
+    if xp <= 0:
+        return 0
+    return bisect_right(LEVEL_THRESHOLDS, xp)
+
+
+def xp_in_level(xp, level):
+    """Return (XP progress within the level, XP span of the level)"""
+    xp_for_current_level = xp_for_level(level)
+    xp_for_next_level = xp_for_level(level + 1)
+
+    xp_in_current = max(0, xp - xp_for_current_level)
+    xp_needed_for_next = max(1, xp_for_next_level - xp_for_current_level)
+
+    return xp_in_current, xp_needed_for_next
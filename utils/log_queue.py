@@ -0,0 +1,152 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+
+import discord
+
+from config import AUDIT_BATCH_DELAY, AUDIT_QUEUE_LIMIT
+
+EMBEDS_PER_MESSAGE = 10         # Discord's limits for a single message
+EMBED_CHARS_PER_MESSAGE = 6000
+
+
+class EmbedBatcher:
+    """Per-channel embed queue that packs up to 10 embeds into each message.
+
+    A channel is flushed as soon as it has a full message's worth of embeds,
+    or `delay` seconds after its first queued embed otherwise. Batches also
+    respect Discord's 6000-character total across a message's embeds, so a
+    run of large edit/delete logs is split rather than rejected.
+
+    If a channel falls more than `limit` embeds behind (a raid or mass role
+    change), the oldest embeds are dropped and replaced by a single summary
+    embed so the queue - and the delay before new events show up - stays
+    bounded.
+    """
+
+    def __init__(self, delay=AUDIT_BATCH_DELAY, limit=AUDIT_QUEUE_LIMIT):
+        self.delay = delay
+        self.limit = limit
+        self.queues = {}        # {channel_id: (channel, deque of (embed, file or None))}
+        self.overflow = {}      # {channel_id: embeds dropped since the last flush}
+        self.tasks = {}         # {channel_id: asyncio.Task}
+        self.wakeups = {}       # {channel_id: asyncio.Event} set when a batch is full
+        self.sending = {}       # {channel_id: (channel, embeds, files)} taken off the queue, not yet sent
+        self.messages_sent = 0
+        self.embeds_sent = 0
+        self.merged = 0         # embeds that shared a message with another embed
+        self.dropped = 0
+        self.failed = 0         # messages Discord refused; their embeds are not counted as sent
+
+    def enqueue(self, channel, embed, file=None):
+        """Queue an embed (and optionally a file attached to the same message) for a channel"""
+        entry = self.queues.get(channel.id)
+        if entry is None:
+            entry = self.queues[channel.id] = (channel, deque())
+        queue = entry[1]
+        queue.append((embed, file))
+
+        if len(queue) > self.limit:
+            queue.popleft()
+            self.dropped += 1
+            self.overflow[channel.id] = self.overflow.get(channel.id, 0) + 1
+
+        if channel.id not in self.tasks:
+            self.wakeups[channel.id] = asyncio.Event()
+            self.tasks[channel.id] = asyncio.create_task(self._run(channel.id))
+        if len(queue) >= EMBEDS_PER_MESSAGE:
+            self.wakeups[channel.id].set()
+
+    async def _run(self, channel_id):
+        channel, queue = self.queues[channel_id]
+        wakeup = self.wakeups[channel_id]
+        try:
+            while queue:
+                # A full batch goes out immediately, a partial one after the deadline
+                if len(queue) < EMBEDS_PER_MESSAGE:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=self.delay)
+                    except asyncio.TimeoutError:
+                        pass
+                wakeup.clear()
+                await self._send_batch(channel, queue)
+        finally:
+            self.tasks.pop(channel_id, None)
+            self.wakeups.pop(channel_id, None)
+            if self.queues.get(channel_id, (None, None))[1] is queue and not queue:
+                del self.queues[channel_id]
+
+    async def _send_batch(self, channel, queue):
+        """Send as many queued embeds (plus any overflow summary) as fit in one message"""
+        batch = []
+        files = []
+        dropped = self.overflow.pop(channel.id, 0)
+        if dropped:
+            batch.append(self._summary(dropped))
+        chars = sum(len(embed) for embed in batch)
+        while queue and len(batch) < EMBEDS_PER_MESSAGE:
+            embed, file = queue[0]
+            if batch and chars + len(embed) > EMBED_CHARS_PER_MESSAGE:
+                break
+            queue.popleft()
+            chars += len(embed)
+            batch.append(embed)
+            if file is not None:
+                files.append(file)
+        if not batch:
+            return
+        # Kept until sent, so close() can finish a flusher cancelled mid-send
+        self.sending[channel.id] = (channel, batch, files)
+        await self._send(channel, batch, files)
+        self.sending.pop(channel.id, None)
+
+    async def _send(self, channel, batch, files):
+        try:
+            if files:
+                await channel.send(embeds=batch, files=files)
+            else:
+                await channel.send(embeds=batch)
+        except (discord.Forbidden, discord.HTTPException):
+            self.failed += 1
+            return
+        self.messages_sent += 1
+        self.embeds_sent += len(batch)
+        self.merged += len(batch) - 1
+
+    @staticmethod
+    def _summary(dropped):
+        return discord.Embed(
+            title='⚠️ Audit Log Overflow',
+            description=f'`{dropped}` older event(s) were dropped because too many happened at once.',
+            color=0x7F8C8D,
+            timestamp=datetime.now(timezone.utc),
+        )
+
+    async def close(self):
+        """Cancel pending deadlines and send everything still queued or half-sent"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
+        self.wakeups.clear()
+        # A batch interrupted mid-send is sent again rather than risk losing it
+        sending, self.sending = list(self.sending.values()), {}
+        for channel, batch, files in sending:
+            for file in files:
+                file.reset()
+            await self._send(channel, batch, files)
+        pending, self.queues = list(self.queues.values()), {}
+        for channel, queue in pending:
+            while queue or channel.id in self.overflow:
+                await self._send_batch(channel, queue)
+
+    def stats(self):
+        return {
+            'queued': sum(len(queue) for _, queue in self.queues.values()),
+            'messages_sent': self.messages_sent,
+            'embeds_sent': self.embeds_sent,
+            'merged': self.merged,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+from config import MESSAGE_CACHE_PER_GUILD
+
+
+class CachedMessage:
+    """The parts of a message the audit log needs once the message is gone"""
+
+    __slots__ = ('id', 'author_id', 'channel_id', 'content', 'attachments')
+
+    def __init__(self, id, author_id, channel_id, content, attachments=()):
+        self.id = id
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.content = content
+        self.attachments = attachments  # tuple of attachment filenames
+
+
+class MessageCache:
+    """Per-guild LRU of CachedMessage records.
+
+    Unlike discord.py's message cache this keeps no Message objects (authors,
+    embeds, components, ...), so it can hold far more history per guild for
+    the same memory, and one busy guild can't evict another guild's messages.
+    """
+
+    def __init__(self, per_guild=MESSAGE_CACHE_PER_GUILD):
+        self.per_guild = per_guild
+        self.guilds = {}  # {guild_id: OrderedDict {message_id: CachedMessage}}
+
+    def add(self, message):
+        """Remember a guild message"""
+        messages = self.guilds.get(message.guild.id)
+        if messages is None:
+            messages = self.guilds[message.guild.id] = OrderedDict()
+        messages[message.id] = CachedMessage(
+            message.id,
+            message.author.id,
+            message.channel.id,
+            message.content,
+            tuple(a.filename for a in message.attachments),
+        )
+        if len(messages) > self.per_guild:
+            messages.popitem(last=False)
+
+    def get(self, guild_id, message_id):
+        messages = self.guilds.get(guild_id)
+        return messages.get(message_id) if messages else None
+
+    def pop(self, guild_id, message_id):
+        messages = self.guilds.get(guild_id)
+        return messages.pop(message_id, None) if messages else None
+
+    def update(self, guild_id, message_id, content):
+        """Record an edit; returns the record (now holding the new content) or None"""
+        record = self.get(guild_id, message_id)
+        if record is not None:
+            record.content = content
+            self.guilds[guild_id].move_to_end(message_id)
+        return record
+
+    def remove_guild(self, guild_id):
+        self.guilds.pop(guild_id, None)
+
+    def __len__(self):
+        return sum(len(messages) for messages in self.guilds.values())
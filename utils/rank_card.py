@@ -0,0 +1,115 @@
+import io
+
+from utils.assets import get_font
+from utils.encode import encode_image
+from utils.levels import level_for_xp, xp_in_level
+
+# (face, size) of every font the card uses, for utils.assets.preload_fonts
+TITLE_FONT = ('arial', 24)
+NORMAL_FONT = ('arial', 18)
+SMALL_FONT = ('arial', 14)
+RANK_CARD_FONTS = (TITLE_FONT, NORMAL_FONT, SMALL_FONT)
+
+
+def render_rank_card(display_name, text_xp, voice_xp, avatar_bytes=None, encoding='png'):
+    """Render a rank card and return it encoded as `encoding` (see utils.encode).
+
+    Takes only primitive inputs so it can run in a worker thread or process
+    (see utils.render_pool) without touching discord.py objects.
+    """
+    # Pillow is imported on the first render rather than when the cog loads
+    from PIL import Image, ImageDraw
+    from utils.render_primitives import circle_mask
+
+    # Ensure XP values are integers and non-negative
+    text_xp = max(0, int(text_xp))
+    voice_xp = max(0, int(voice_xp))
+
+    text_level = level_for_xp(text_xp)
+    voice_level = level_for_xp(voice_xp)
+
+    text_xp_in_level, text_xp_needed = xp_in_level(text_xp, text_level)
+    voice_xp_in_level, voice_xp_needed = xp_in_level(voice_xp, voice_level)
+
+    # Ensure progress values are valid (0.0 to 1.0)
+    text_progress = max(0.0, min(1.0, text_xp_in_level / text_xp_needed if text_xp_needed > 0 else 0.0))
+    voice_progress = max(0.0, min(1.0, voice_xp_in_level / voice_xp_needed if voice_xp_needed > 0 else 0.0))
+
+    # Create image
+    width, height = 600, 200
+    img = Image.new('RGB', (width, height), color=(44, 47, 51))
+    draw = ImageDraw.Draw(img)
+
+    # Fonts are loaded once per process and shared between renders
+    title_font = get_font(*TITLE_FONT)
+    normal_font = get_font(*NORMAL_FONT)
+    small_font = get_font(*SMALL_FONT)
+
+    # Draw avatar
+    avatar_size = 120
+    avatar_x, avatar_y = 20, 40
+    try:
+        if avatar_bytes is None:
+            raise ValueError("no avatar")
+        avatar_img = Image.open(io.BytesIO(avatar_bytes))
+        avatar_img = avatar_img.resize((avatar_size, avatar_size), Image.Resampling.LANCZOS)
+
+        # Apply the shared circular mask
+        img.paste(avatar_img, (avatar_x, avatar_y), circle_mask(avatar_size))
+
+        # Draw border
+        draw.ellipse([avatar_x, avatar_y, avatar_x + avatar_size, avatar_y + avatar_size],
+                     outline=(255, 255, 255), width=3)
+    except:
+        # Fallback circle
+        draw.ellipse([avatar_x, avatar_y, avatar_x + avatar_size, avatar_y + avatar_size],
+                     fill=(114, 137, 218), outline=(255, 255, 255), width=3)
+
+    # Draw username
+    username = display_name[:20]
+    draw.text((160, 30), username, fill=(255, 255, 255), font=title_font)
+
+    # Draw text level
+    y_offset = 70
+    draw.text((160, y_offset), f"Text Level: {text_level}", fill=(255, 255, 255), font=normal_font)
+
+    # Text XP bar
+    bar_x, bar_y = 160, y_offset + 30
+    bar_width, bar_height = 400, 20
+    draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height],
+                   fill=(35, 39, 42), outline=(255, 255, 255), width=2)
+
+    fill_width = int(bar_width * text_progress)
+    if fill_width > 0:
+        fill_width = max(1, fill_width)
+        draw.rectangle([bar_x, bar_y, bar_x + fill_width, bar_y + bar_height],
+                       fill=(114, 137, 218))
+
+    xp_text = f"{text_xp_in_level}/{text_xp_needed} XP"
+    text_bbox = draw.textbbox((0, 0), xp_text, font=small_font)
+    text_width = text_bbox[2] - text_bbox[0]
+    draw.text((bar_x + bar_width // 2 - text_width // 2, bar_y + 2), xp_text,
+              fill=(255, 255, 255), font=small_font)
+
+    # Draw voice level
+    y_offset = 130
+    draw.text((160, y_offset), f"Voice Level: {voice_level}", fill=(255, 255, 255), font=normal_font)
+
+    # Voice XP bar
+    bar_x, bar_y = 160, y_offset + 30
+    draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height],
+                   fill=(35, 39, 42), outline=(255, 255, 255), width=2)
+
+    fill_width = int(bar_width * voice_progress)
+    if fill_width > 0:
+        fill_width = max(1, fill_width)
+        draw.rectangle([bar_x, bar_y, bar_x + fill_width, bar_y + bar_height],
+                       fill=(46, 204, 113))
+
+    xp_text = f"{voice_xp_in_level}/{voice_xp_needed} XP"
+    text_bbox = draw.textbbox((0, 0), xp_text, font=small_font)
+    text_width = text_bbox[2] - text_bbox[0]
+    draw.text((bar_x + bar_width // 2 - text_width // 2, bar_y + 2), xp_text,
+              fill=(255, 255, 255), font=small_font)
+
+    return encode_image(img, encoding)
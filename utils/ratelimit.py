@@ -0,0 +1,51 @@
+from collections import deque
+
+
+class SlidingWindowLimiter:
+    """Allows at most max_events per key within any window-second span.
+
+    Each key keeps a ring of its last max_events timestamps (every event is
+    recorded, allowed or not, matching the original spam filter). An event is
+    refused when the ring is full and its oldest entry is still inside the
+    window, which makes admission O(1) with no list rebuilding.
+
+    Idle keys are expired lazily through a timer wheel: every event drops its
+    key into the bucket for the current window-sized slot, and sweep() only
+    visits buckets that have fully aged out instead of scanning every key.
+    """
+
+    def __init__(self, max_events, window):
+        self.max_events = max_events
+        self.window = window
+        self.rings = {}  # {key: deque of the last max_events timestamps}
+        self.wheel = {}  # {slot: set of keys seen during that slot}
+
+    def hit(self, key, now):
+        """Record an event for key at time now; return True if it is within the limit"""
+        ring = self.rings.get(key)
+        if ring is None:
+            ring = self.rings[key] = deque(maxlen=self.max_events)
+        allowed = len(ring) < self.max_events or ring[0] <= now - self.window
+        ring.append(now)
+
+        slot = int(now // self.window)
+        bucket = self.wheel.get(slot)
+        if bucket is None:
+            bucket = self.wheel[slot] = set()
+        bucket.add(key)
+        return allowed
+
+    def sweep(self, now):
+        """Forget keys whose newest event is older than the window"""
+        cutoff = now - self.window
+        # Slots ending before the cutoff can only hold expired events
+        last_expired_slot = int(cutoff // self.window) - 1
+        for slot in [slot for slot in self.wheel if slot <= last_expired_slot]:
+            for key in self.wheel.pop(slot):
+                ring = self.rings.get(key)
+                # Keys active since then are still referenced by a newer slot
+                if ring is not None and ring[-1] <= cutoff:
+                    del self.rings[key]
+
+    def __len__(self):
+        return len(self.rings)
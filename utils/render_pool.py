@@ -0,0 +1,45 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from config import PRELOAD_FONTS, RENDER_EXECUTOR, RENDER_WORKERS
+from utils.assets import preload_fonts
+from utils.rank_card import RANK_CARD_FONTS
+
+_executor = None
+
+
+def get_render_executor():
+    """Return the shared executor used for Pillow work, creating it on first use"""
+    global _executor
+    if _executor is None:
+        if RENDER_EXECUTOR == 'process':
+            # Each worker process has its own font cache, so every one warms it as it starts
+            if PRELOAD_FONTS:
+                _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                                initializer=preload_fonts, initargs=(RANK_CARD_FONTS,))
+            else:
+                _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+        elif RENDER_EXECUTOR == 'thread':
+            _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='render')
+        else:
+            raise ValueError(f"Unknown RENDER_EXECUTOR: {RENDER_EXECUTOR!r} (expected 'thread' or 'process')")
+    return _executor
+
+
+async def run_render(func, *args):
+    """Run a pure render function off the event loop and await its result.
+
+    With the process executor func and its arguments must be picklable, which
+    is why renderers take primitives (names, numbers, bytes) rather than
+    discord.py objects.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_render_executor(), func, *args)
+
+
+def shutdown_render_executor():
+    """Stop the shared executor, if one was started"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
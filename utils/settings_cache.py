@@ -0,0 +1,90 @@
+import asyncio
+from typing import TypedDict
+
+from config import SETTINGS_WATCH_INTERVAL
+from utils.storage import SETTINGS_FILES, get_storage
+
+
+class LevellingSettings(TypedDict, total=False):
+    level_channel_id: int | None
+    xp_per_message_min: int
+    xp_per_message_max: int
+    vc_xp_per_minute: int
+
+
+class WelcomeSettings(TypedDict, total=False):
+    channel_id: int | None
+    background_path: str | None
+
+
+class AuditSettings(TypedDict, total=False):
+    channel_id: int | None
+
+
+class SettingsCache:
+    """Every namespace's guild settings, loaded once and updated in place.
+
+    Reads never touch the backend. Writes go through to storage and update the
+    cached dict immediately. When the backend is editable by hand (the JSON
+    files) watch() polls each namespace's mtime and reloads it on change.
+    """
+
+    def __init__(self, storage, watch_interval=SETTINGS_WATCH_INTERVAL):
+        self.storage = storage
+        self.watch_interval = watch_interval
+        self.settings = {}  # {namespace: {guild_id_str: settings dict}}
+        self.mtimes = {}    # {namespace: mtime seen at the last (re)load or write}
+        self.own_writes = set()  # namespaces whose file will change because of set(), not an edit
+        self.watch_task = None
+        for namespace in SETTINGS_FILES:
+            self.reload(namespace)
+
+    def reload(self, namespace):
+        """Re-read a namespace from storage"""
+        self.mtimes[namespace] = self.storage.settings_mtime(namespace)
+        self.settings[namespace] = self.storage.load_settings(namespace)
+
+    def get(self, namespace, guild_id):
+        """Return a guild's settings dict (shared; do not mutate), or None if it has none"""
+        return self.settings[namespace].get(str(guild_id))
+
+    def set(self, namespace, guild_id, key, value):
+        """Set a single setting for a guild in storage and in the cache"""
+        self.storage.set_setting(namespace, guild_id, key, value)
+        self.settings[namespace].setdefault(str(guild_id), {})[key] = value
+        # Our own write shouldn't trigger a reload. A queued write only changes
+        # the file once it lands, so watch() records that mtime instead.
+        if self.storage.settings_pending(namespace):
+            self.own_writes.add(namespace)
+        else:
+            self.mtimes[namespace] = self.storage.settings_mtime(namespace)
+
+    def start_watching(self):
+        """Start the mtime watcher if enabled and not already running"""
+        if self.watch_interval and self.watch_task is None:
+            self.watch_task = asyncio.create_task(self.watch())
+
+    async def watch(self):
+        """Reload namespaces whose files were changed outside the bot"""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            for namespace in self.settings:
+                if self.storage.settings_pending(namespace):
+                    continue
+                mtime = self.storage.settings_mtime(namespace)
+                if namespace in self.own_writes:
+                    self.own_writes.discard(namespace)
+                    self.mtimes[namespace] = mtime
+                elif mtime is not None and mtime != self.mtimes.get(namespace):
+                    self.reload(namespace)
+
+
+_settings_cache = None
+
+
+def get_settings_cache():
+    """Return the process-wide settings cache over the shared storage backend"""
+    global _settings_cache
+    if _settings_cache is None:
+        _settings_cache = SettingsCache(get_storage())
+    return _settings_cache
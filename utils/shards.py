@@ -0,0 +1,61 @@
+import os
+from collections import Counter
+
+import discord
+
+from config import SHARDING, SHARD_COUNT, SHARD_IDS
+
+
+def shard_options():
+    """Return (sharded, shard_count, shard_ids) from config, overridden by the environment"""
+    shard_count = int(os.getenv('SHARD_COUNT') or 0) or SHARD_COUNT
+    shard_ids = SHARD_IDS
+    if os.getenv('SHARD_IDS'):
+        shard_ids = [int(shard_id) for shard_id in os.getenv('SHARD_IDS').split(',') if shard_id.strip()]
+    if shard_ids and not shard_count:
+        raise ValueError('SHARD_IDS needs SHARD_COUNT to be set as well')
+    return bool(SHARDING or shard_count or shard_ids), shard_count, shard_ids
+
+
+class ShardMetrics:
+    """Dispatched events and connection changes, counted per shard.
+
+    Events are attributed to the shard of the guild they belong to; events
+    with no guild (DMs, user updates, ready) are counted under None.
+    """
+
+    def __init__(self):
+        self.events = {}       # {shard_id | None: Counter {event name: count}}
+        self.connects = Counter()
+        self.disconnects = Counter()
+        self.resumes = Counter()
+
+    def record(self, shard_id, event_name):
+        counter = self.events.get(shard_id)
+        if counter is None:
+            counter = self.events[shard_id] = Counter()
+        counter[event_name] += 1
+        if event_name == 'shard_connect':
+            self.connects[shard_id] += 1
+        elif event_name == 'shard_disconnect':
+            self.disconnects[shard_id] += 1
+        elif event_name == 'shard_resumed':
+            self.resumes[shard_id] += 1
+
+    @staticmethod
+    def guild_id_of(args):
+        """Best-effort guild ID for a dispatched event's arguments"""
+        if not args:
+            return None
+        first = args[0]
+        if isinstance(first, discord.Guild):
+            return first.id
+        guild_id = getattr(first, 'guild_id', None)  # raw event payloads
+        if guild_id is not None:
+            return guild_id
+        guild = getattr(first, 'guild', None)
+        return getattr(guild, 'id', None)
+
+    def total(self, shard_id):
+        counter = self.events.get(shard_id)
+        return sum(counter.values()) if counter else 0
@@ -0,0 +1,405 @@
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+
+from config import STORAGE_BACKEND, SQLITE_PATH
+from utils.async_io import AsyncJSONWriter, atomic_write_json
+
+DATA_DIR = 'data'
+
+# Settings namespaces and the JSON file each one has historically lived in
+SETTINGS_FILES = {
+    'levelling': 'guild_settings.json',
+    'welcome': 'welcome_settings.json',
+    'audit': 'audit_settings.json',
+}
+XP_FILE = 'xp_data.json'
+REWARDS_FILE = 'role_rewards.json'
+
+
+def load_json(filepath):
+    """Load JSON data from file"""
+    try:
+        if os.path.exists(filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+    except (json.JSONDecodeError, IOError):
+        return {}
+
+
+def save_json(filepath, data):
+    """Save JSON data to file (atomically, so a crash can't leave it truncated)"""
+    try:
+        atomic_write_json(filepath, data)
+        return True
+    except IOError:
+        return False
+
+
+def _copy_users(users):
+    return {
+        user_id_str: dict(xp_data) if isinstance(xp_data, dict) else xp_data
+        for user_id_str, xp_data in users.items()
+    }
+
+
+def _copy_xp(data):
+    return {guild_id_str: _copy_users(users) for guild_id_str, users in data.items()}
+
+
+class Storage:
+    """Interface implemented by every storage backend.
+
+    XP rows are exchanged in the JSON layout the bot has always used:
+    {guild_id_str: {user_id_str: {'text_xp': int, 'voice_xp': int}}}.
+    Settings are plain dicts stored per (namespace, guild); see SETTINGS_FILES.
+    """
+
+    # XP --------------------------------------------------------------------
+
+    def load_xp(self):
+        """Return every XP row"""
+        raise NotImplementedError
+
+    def save_xp(self, data, dirty):
+        """Persist the rows named in dirty, a set of (guild_id_str, user_id_str)"""
+        raise NotImplementedError
+
+    # Settings --------------------------------------------------------------
+
+    def load_settings(self, namespace):
+        """Return {guild_id_str: settings_dict} for a namespace"""
+        raise NotImplementedError
+
+    def get_settings(self, namespace, guild_id):
+        """Return the settings dict for a guild, or None if it has none"""
+        raise NotImplementedError
+
+    def set_setting(self, namespace, guild_id, key, value):
+        """Set a single setting for a guild"""
+        raise NotImplementedError
+
+    def settings_mtime(self, namespace):
+        """Return when a namespace was last modified on disk, or None if that can't be edited by hand"""
+        return None
+
+    def settings_pending(self, namespace):
+        """Return True while a write to a namespace is queued but not yet on disk"""
+        return False
+
+    # Role rewards ----------------------------------------------------------
+
+    def get_role_rewards(self, guild_id):
+        """Return {role_id_str: {'text_level': int, 'voice_level': int}}"""
+        raise NotImplementedError
+
+    def set_role_reward(self, guild_id, role_id, text_level, voice_level):
+        raise NotImplementedError
+
+    def delete_role_reward(self, guild_id, role_id):
+        """Remove a role reward, returning True if one existed"""
+        raise NotImplementedError
+
+    async def drain(self):
+        """Wait for any writes still running in the background; returns False if one of them failed"""
+        return True
+
+    def close(self):
+        pass
+
+
+class JSONStorage(Storage):
+    """The original flat-file layout: one JSON document per data set.
+
+    Inside a running event loop, writes are handed to an AsyncJSONWriter so
+    serialising and writing happen off the loop; reads see data that is
+    still queued for writing. Outside a loop (scripts, migrations) they are
+    written synchronously.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.writer = AsyncJSONWriter()
+        self.xp_file = os.path.join(data_dir, XP_FILE)
+        self.rewards_file = os.path.join(data_dir, REWARDS_FILE)
+        self.xp_snapshot = None  # rows last handed to save_xp's write; never mutated
+        self.settings_files = {
+            namespace: os.path.join(data_dir, filename)
+            for namespace, filename in SETTINGS_FILES.items()
+        }
+        self.init_data_files()
+
+    def init_data_files(self):
+        """Initialize JSON data files"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        for filepath in (self.xp_file, self.rewards_file, *self.settings_files.values()):
+            if not os.path.exists(filepath):
+                save_json(filepath, {})
+
+    def _read(self, filepath):
+        pending = self.writer.get_latest(filepath)
+        if pending is not None:
+            return copy.deepcopy(pending)
+        return load_json(filepath)
+
+    def _write(self, filepath, data):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return save_json(filepath, data)
+        self.writer.save(filepath, data)
+        return True
+
+    async def drain(self):
+        return await self.writer.drain()
+
+    def load_xp(self):
+        data = self._read(self.xp_file)
+        self.xp_snapshot = _copy_xp(data)
+        return data
+
+    def save_xp(self, data, dirty):
+        # A flat file can only be rewritten as a whole, and the background
+        # write mustn't race the XP store mutating the rows it's given. The
+        # last snapshot's rows are never mutated, so only dirty rows are
+        # copied; clean guilds are shared with the previous snapshot as-is.
+        previous = self.xp_snapshot
+        if previous is None:
+            snapshot = _copy_xp(data)
+        else:
+            dirty_by_guild = {}
+            for guild_id_str, user_id_str in dirty:
+                dirty_by_guild.setdefault(guild_id_str, []).append(user_id_str)
+            snapshot = {}
+            for guild_id_str, users in data.items():
+                old_users = previous.get(guild_id_str)
+                dirty_users = dirty_by_guild.get(guild_id_str)
+                if old_users is None:
+                    snapshot[guild_id_str] = _copy_users(users)
+                elif not dirty_users:
+                    snapshot[guild_id_str] = old_users
+                else:
+                    new_users = dict(old_users)
+                    for user_id_str in dirty_users:
+                        xp_data = users.get(user_id_str)
+                        if xp_data is None:
+                            new_users.pop(user_id_str, None)
+                        else:
+                            new_users[user_id_str] = dict(xp_data) if isinstance(xp_data, dict) else xp_data
+                    snapshot[guild_id_str] = new_users
+        self.xp_snapshot = snapshot
+        return self._write(self.xp_file, snapshot)
+
+    def load_settings(self, namespace):
+        return self._read(self.settings_files[namespace])
+
+    def get_settings(self, namespace, guild_id):
+        return self._read(self.settings_files[namespace]).get(str(guild_id))
+
+    def set_setting(self, namespace, guild_id, key, value):
+        filepath = self.settings_files[namespace]
+        data = self._read(filepath)
+        data.setdefault(str(guild_id), {})[key] = value
+        self._write(filepath, data)
+
+    def settings_mtime(self, namespace):
+        try:
+            return os.path.getmtime(self.settings_files[namespace])
+        except OSError:
+            return None
+
+    def settings_pending(self, namespace):
+        return self.settings_files[namespace] in self.writer.tasks
+
+    def get_role_rewards(self, guild_id):
+        return self._read(self.rewards_file).get(str(guild_id), {})
+
+    def set_role_reward(self, guild_id, role_id, text_level, voice_level):
+        data = self._read(self.rewards_file)
+        data.setdefault(str(guild_id), {})[str(role_id)] = {
+            'text_level': text_level,
+            'voice_level': voice_level
+        }
+        self._write(self.rewards_file, data)
+
+    def delete_role_reward(self, guild_id, role_id):
+        data = self._read(self.rewards_file)
+        rewards = data.get(str(guild_id), {})
+        if str(role_id) not in rewards:
+            return False
+        del rewards[str(role_id)]
+        self._write(self.rewards_file, data)
+        return True
+
+
+class SQLiteStorage(Storage):
+    """SQLite database in WAL mode with one indexed row per guild/user."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS xp (
+            guild_id INTEGER NOT NULL,
+            user_id  INTEGER NOT NULL,
+            text_xp  INTEGER NOT NULL DEFAULT 0,
+            voice_xp INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS guild_settings (
+            namespace TEXT    NOT NULL,
+            guild_id  INTEGER NOT NULL,
+            key       TEXT    NOT NULL,
+            value     TEXT,
+            PRIMARY KEY (namespace, guild_id, key)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS role_rewards (
+            guild_id    INTEGER NOT NULL,
+            role_id     INTEGER NOT NULL,
+            text_level  INTEGER NOT NULL,
+            voice_level INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, role_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS meta (
+            key   TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path=SQLITE_PATH, data_dir=DATA_DIR):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+        self.migrate_from_json(data_dir)
+
+    def migrate_from_json(self, data_dir):
+        """One-shot import of the legacy JSON files; does nothing once it has run"""
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return False
+
+        xp_rows = []
+        for guild_id_str, users in load_json(os.path.join(data_dir, XP_FILE)).items():
+            for user_id_str, xp_data in users.items():
+                if isinstance(xp_data, dict):
+                    xp_rows.append((int(guild_id_str), int(user_id_str),
+                                    max(0, int(xp_data.get('text_xp', 0))),
+                                    max(0, int(xp_data.get('voice_xp', 0)))))
+
+        setting_rows = []
+        for namespace, filename in SETTINGS_FILES.items():
+            for guild_id_str, settings in load_json(os.path.join(data_dir, filename)).items():
+                for key, value in settings.items():
+                    setting_rows.append((namespace, int(guild_id_str), key, json.dumps(value)))
+
+        reward_rows = []
+        for guild_id_str, rewards in load_json(os.path.join(data_dir, REWARDS_FILE)).items():
+            for role_id_str, reward_data in rewards.items():
+                reward_rows.append((int(guild_id_str), int(role_id_str),
+                                    reward_data.get('text_level', 0),
+                                    reward_data.get('voice_level', 0)))
+
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO xp (guild_id, user_id, text_xp, voice_xp) VALUES (?, ?, ?, ?)',
+                xp_rows)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO guild_settings (namespace, guild_id, key, value) VALUES (?, ?, ?, ?)',
+                setting_rows)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO role_rewards (guild_id, role_id, text_level, voice_level) VALUES (?, ?, ?, ?)',
+                reward_rows)
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', '1')")
+        return True
+
+    def load_xp(self):
+        data = {}
+        for guild_id, user_id, text_xp, voice_xp in self.conn.execute(
+                'SELECT guild_id, user_id, text_xp, voice_xp FROM xp'):
+            data.setdefault(str(guild_id), {})[str(user_id)] = {'text_xp': text_xp, 'voice_xp': voice_xp}
+        return data
+
+    def save_xp(self, data, dirty):
+        rows = []
+        for guild_id_str, user_id_str in dirty:
+            xp_data = data.get(guild_id_str, {}).get(user_id_str)
+            if isinstance(xp_data, dict):
+                rows.append((int(guild_id_str), int(user_id_str),
+                             int(xp_data.get('text_xp', 0)), int(xp_data.get('voice_xp', 0))))
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO xp (guild_id, user_id, text_xp, voice_xp) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (guild_id, user_id) DO UPDATE SET '
+                    'text_xp = excluded.text_xp, voice_xp = excluded.voice_xp',
+                    rows)
+        except sqlite3.Error:
+            return False
+        return True
+
+    def load_settings(self, namespace):
+        data = {}
+        for guild_id, key, value in self.conn.execute(
+                'SELECT guild_id, key, value FROM guild_settings WHERE namespace = ?', (namespace,)):
+            data.setdefault(str(guild_id), {})[key] = json.loads(value)
+        return data
+
+    def get_settings(self, namespace, guild_id):
+        rows = self.conn.execute(
+            'SELECT key, value FROM guild_settings WHERE namespace = ? AND guild_id = ?',
+            (namespace, guild_id)).fetchall()
+        if not rows:
+            return None
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_setting(self, namespace, guild_id, key, value):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO guild_settings (namespace, guild_id, key, value) VALUES (?, ?, ?, ?)',
+                (namespace, guild_id, key, json.dumps(value)))
+
+    def get_role_rewards(self, guild_id):
+        return {
+            str(role_id): {'text_level': text_level, 'voice_level': voice_level}
+            for role_id, text_level, voice_level in self.conn.execute(
+                'SELECT role_id, text_level, voice_level FROM role_rewards WHERE guild_id = ?',
+                (guild_id,))
+        }
+
+    def set_role_reward(self, guild_id, role_id, text_level, voice_level):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO role_rewards (guild_id, role_id, text_level, voice_level) VALUES (?, ?, ?, ?)',
+                (guild_id, role_id, text_level, voice_level))
+
+    def delete_role_reward(self, guild_id, role_id):
+        with self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM role_rewards WHERE guild_id = ? AND role_id = ?', (guild_id, role_id))
+        return cursor.rowcount > 0
+
+    def close(self):
+        self.conn.close()
+
+
+_storage = None
+
+
+def get_storage():
+    """Return the process-wide storage backend selected by STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == 'sqlite':
+            _storage = SQLiteStorage()
+        elif STORAGE_BACKEND == 'json':
+            _storage = JSONStorage()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND!r} (expected 'json' or 'sqlite')")
+    return _storage
@@ -0,0 +1,91 @@
+import glob
+import os
+import struct
+import time
+
+from config import XP_JOURNAL_PATH
+
+# guild_id, user_id, d_text, d_voice, text_total, voice_total, timestamp
+RECORD = struct.Struct('<QQqqqqd')
+
+
+class XPJournal:
+    """Append-only binary log of XP changes.
+
+    Each change is one fixed-width record holding the delta and the totals
+    it produced. Replaying a record sets the row to its totals, so replay
+    is idempotent: records already folded into a snapshot can be applied
+    again without double counting.
+
+    The active file is sealed into a numbered segment (path.1, path.2, ...)
+    by rotate() when a compaction starts, and the segment is only deleted
+    once the snapshot that contains it has been written.
+    """
+
+    def __init__(self, path=XP_JOURNAL_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'ab')
+        # Drop a partial record left by a crash so new records stay aligned
+        torn = self.file.tell() % RECORD.size
+        if torn:
+            self.file.truncate(self.file.tell() - torn)
+            self.file.seek(0, os.SEEK_END)
+        self.records = 0
+
+    def append(self, guild_id, user_id, d_text, d_voice, text_total, voice_total):
+        self.file.write(RECORD.pack(guild_id, user_id, d_text, d_voice, text_total, voice_total, time.time()))
+        self.records += 1
+
+    def flush(self):
+        """Push buffered records to disk"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def size(self):
+        return self.file.tell()
+
+    def segments(self):
+        """Sealed segment paths, oldest first"""
+        numbered = []
+        for segment in glob.glob(glob.escape(self.path) + '.*'):
+            suffix = segment[len(self.path) + 1:]
+            if suffix.isdigit():
+                numbered.append((int(suffix), segment))
+        return [segment for _, segment in sorted(numbered)]
+
+    def rotate(self):
+        """Seal the active file as the newest segment and start a new one; returns the segment path"""
+        self.flush()
+        self.file.close()
+        existing = self.segments()
+        seq = int(existing[-1].rsplit('.', 1)[1]) + 1 if existing else 1
+        segment = f'{self.path}.{seq}'
+        os.replace(self.path, segment)
+        self.file = open(self.path, 'ab')
+        return segment
+
+    def discard(self, segments):
+        """Delete segments whose records are safely in a snapshot"""
+        for segment in segments:
+            try:
+                os.remove(segment)
+            except FileNotFoundError:
+                pass
+
+    def replay(self):
+        """Yield every record (as a RECORD tuple) from the sealed segments and the active file, oldest first"""
+        self.file.flush()
+        for path in (*self.segments(), self.path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            # A crash mid-append can leave a partial record at the end of a segment
+            usable = len(data) - len(data) % RECORD.size
+            yield from RECORD.iter_unpack(data[:usable])
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
@@ -0,0 +1,119 @@
+from utils.leaderboard import GuildLeaderboard
+
+
+class XPStore:
+    """Resident copy of the XP data with write-behind flushing.
+
+    XP rows are read from the storage backend once when the store is created.
+    Reads and writes are then served from memory, and every changed
+    (guild, user) row is recorded in a dirty set so that flush() only hands
+    the backend the rows that actually changed.
+
+    With a journal, every change is also appended to it. flush() then only
+    has to sync the journal, and the backend snapshot is rewritten by
+    compact() every so often instead of on every flush.
+    """
+
+    def __init__(self, storage, journal=None):
+        self.storage = storage
+        self.journal = journal
+        self.data = {}      # {guild_id_str: {user_id_str: {'text_xp': int, 'voice_xp': int}}}
+        self.dirty = set()  # {(guild_id_str, user_id_str)} changed since the last snapshot
+        self.leaderboards = {}  # {guild_id_str: GuildLeaderboard}, built on first use
+        self.load()
+
+    def load(self):
+        """Load XP data from the backend and replay the journal on top, replacing anything held in memory"""
+        self.data = self.storage.load_xp()
+        self.dirty.clear()
+        self.leaderboards.clear()
+        if self.journal is not None:
+            for guild_id, user_id, _, _, text_xp, voice_xp, _ in self.journal.replay():
+                guild_id_str, user_id_str = str(guild_id), str(user_id)
+                self.data.setdefault(guild_id_str, {})[user_id_str] = {'text_xp': text_xp, 'voice_xp': voice_xp}
+                self.dirty.add((guild_id_str, user_id_str))
+
+    def flush(self):
+        """Make changes durable: sync the journal, or write changed rows to the backend without one"""
+        if self.journal is not None:
+            self.journal.flush()
+            return True
+        return self.save_snapshot()
+
+    def save_snapshot(self):
+        """Write changed rows back to the backend"""
+        if not self.dirty:
+            return True
+        if not self.storage.save_xp(self.data, self.dirty):
+            return False
+        self.dirty.clear()
+        return True
+
+    async def compact(self):
+        """Fold the journal into a backend snapshot and delete the folded segments"""
+        if self.journal is None:
+            return self.save_snapshot()
+        self.journal.rotate()
+        segments = self.journal.segments()
+        saved = self.save_snapshot()
+        # The segments can only go once the snapshot is actually on disk
+        if await self.storage.drain() and saved:
+            self.journal.discard(segments)
+            return True
+        return False
+
+    def get(self, user_id, guild_id):
+        """Return (text_xp, voice_xp) for a user, clamped to non-negative ints"""
+        users = self.data.get(str(guild_id))
+        if users:
+            xp_data = users.get(str(user_id))
+            if isinstance(xp_data, dict):
+                return (max(0, int(xp_data.get('text_xp', 0))),
+                        max(0, int(xp_data.get('voice_xp', 0))))
+        return 0, 0
+
+    def set(self, user_id, guild_id, text_xp, voice_xp):
+        """Set a user's XP totals and mark the row dirty"""
+        guild_id_str = str(guild_id)
+        user_id_str = str(user_id)
+        text_xp, voice_xp = int(text_xp), int(voice_xp)
+        old = self.get(user_id, guild_id)
+        leaderboard = self.leaderboards.get(guild_id_str)
+        if leaderboard is not None:
+            leaderboard.update(int(user_id), old, (text_xp, voice_xp))
+        if self.journal is not None:
+            self.journal.append(int(guild_id), int(user_id), text_xp - old[0], voice_xp - old[1], text_xp, voice_xp)
+        users = self.data.setdefault(guild_id_str, {})
+        users[user_id_str] = {'text_xp': text_xp, 'voice_xp': voice_xp}
+        self.dirty.add((guild_id_str, user_id_str))
+
+    def leaderboard(self, guild_id):
+        """Return the guild's ranked index, building it from memory the first time"""
+        guild_id_str = str(guild_id)
+        leaderboard = self.leaderboards.get(guild_id_str)
+        if leaderboard is None:
+            leaderboard = GuildLeaderboard(self.data.get(guild_id_str))
+            self.leaderboards[guild_id_str] = leaderboard
+        return leaderboard
+
+    def fix_negative(self):
+        """Clamp every negative XP value to 0, returning True if anything changed"""
+        fixed = False
+        for guild_id_str, users in self.data.items():
+            for user_id_str, xp_data in users.items():
+                if not isinstance(xp_data, dict):
+                    continue
+                d_text = d_voice = 0
+                if xp_data.get('text_xp', 0) < 0:
+                    d_text = -xp_data['text_xp']
+                    xp_data['text_xp'] = 0
+                if xp_data.get('voice_xp', 0) < 0:
+                    d_voice = -xp_data['voice_xp']
+                    xp_data['voice_xp'] = 0
+                if d_text or d_voice:
+                    fixed = True
+                    self.dirty.add((guild_id_str, user_id_str))
+                    if self.journal is not None:
+                        self.journal.append(int(guild_id_str), int(user_id_str), d_text, d_voice,
+                                            int(xp_data.get('text_xp', 0)), int(xp_data.get('voice_xp', 0)))
+        return fixed